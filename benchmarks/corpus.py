@@ -0,0 +1,171 @@
+import random
+
+KEYWORDS = ['if', 'else', 'while', 'for', 'return', 'let', 'var', 'new', 'this']
+NAMES = [
+    'count', 'total', 'index', 'value', 'result', 'node', 'left', 'right',
+    'buffer', 'width', 'height', 'offset', 'name', 'items', 'other',
+]
+TYPES = ['Int', 'Double', 'String', 'Boolean', 'List', 'Point', 'Shape']
+BINARY_OPERATORS = [
+    '+', '-', '*', '/', '%', '==', '!=', '<', '<=', '>', '>=', '&&', '||',
+]
+ASSIGNMENT_OPERATORS = ['<-', '=', '+=', '-=', '*=', '/=', '%=']
+WORDS = [
+    'the', 'total', 'of', 'all', 'items', 'is', 'kept', 'here', 'for', 'now',
+    'update', 'when', 'width', 'changes', 'cached', 'result',
+]
+ESCAPES = ['\\"', '\\\\', '\\n', '\\t']
+
+class CorpusGenerator(object):
+
+    CATEGORIES = (
+        'program', 'identifiers', 'numbers', 'strings', 'operators',
+        'delimiters')
+
+    def __init__(self, seed=0):
+        self.random = random.Random(seed)
+
+    def identifier(self):
+        name = self.random.choice(NAMES)
+        if self.random.random() < 0.3:
+            name += self.random.choice(TYPES)
+        if self.random.random() < 0.2:
+            name += str(self.random.randint(0, 99))
+        return name
+
+    def number(self):
+        choice = self.random.random()
+        if choice < 0.5:
+            return str(self.random.randint(0, 100000))
+        elif choice < 0.8:
+            return '%d.%d' % (
+                self.random.randint(0, 1000), self.random.randint(0, 9999))
+        return '%d.%de%s%d' % (
+            self.random.randint(1, 9),
+            self.random.randint(0, 99),
+            self.random.choice(['', '+', '-']),
+            self.random.randint(1, 30))
+
+    def string(self):
+        parts = []
+        for _ in range(self.random.randint(0, 8)):
+            if self.random.random() < 0.15:
+                parts.append(self.random.choice(ESCAPES))
+            else:
+                parts.append(self.random.choice(WORDS))
+        return '"%s"' % ' '.join(parts)
+
+    def operand(self):
+        choice = self.random.random()
+        if choice < 0.5:
+            return self.identifier()
+        elif choice < 0.8:
+            return self.number()
+        elif choice < 0.9:
+            return self.string()
+        return '%s.%s' % (self.identifier(), self.identifier())
+
+    def expression(self, depth=0):
+        if depth > 2 or self.random.random() < 0.4:
+            return self.operand()
+
+        choice = self.random.random()
+        if choice < 0.6:
+            return '%s %s %s' % (
+                self.expression(depth + 1),
+                self.random.choice(BINARY_OPERATORS),
+                self.expression(depth + 1))
+        elif choice < 0.8:
+            return '(%s)' % self.expression(depth + 1)
+        return '%s(%s)' % (self.identifier(), ', '.join(
+            self.expression(depth + 1)
+            for _ in range(self.random.randint(0, 3))))
+
+    def comment(self, indent):
+        return '%s// %s\n' % (indent, ' '.join(
+            self.random.choice(WORDS)
+            for _ in range(self.random.randint(2, 8))))
+
+    def statement(self, indent):
+        choice = self.random.random()
+        if choice < 0.1:
+            return self.comment(indent)
+        elif choice < 0.4:
+            return '%slet %s <- %s\n' % (
+                indent, self.identifier(), self.expression())
+        elif choice < 0.7:
+            return '%s%s %s %s\n' % (
+                indent,
+                self.identifier(),
+                self.random.choice(ASSIGNMENT_OPERATORS),
+                self.expression())
+        elif choice < 0.85:
+            return '%sif (%s) {\n%s%s}\n' % (
+                indent,
+                self.expression(),
+                self.statement(indent + '    '),
+                indent)
+        return '%sreturn %s\n' % (indent, self.expression())
+
+    def function(self, indent):
+        parameters = ', '.join(
+            '%s: %s' % (self.identifier(), self.random.choice(TYPES))
+            for _ in range(self.random.randint(0, 3)))
+        body = ''.join(
+            self.statement(indent + '    ')
+            for _ in range(self.random.randint(1, 8)))
+        return '%sfunc %s(%s): %s = {\n%s%s}\n' % (
+            indent,
+            self.identifier(),
+            parameters,
+            self.random.choice(TYPES),
+            body,
+            indent)
+
+    def class_definition(self):
+        fields = ', '.join(
+            '%s: %s' % (self.identifier(), self.random.choice(TYPES))
+            for _ in range(self.random.randint(1, 4)))
+        methods = ''.join(
+            self.function('    ') for _ in range(self.random.randint(1, 4)))
+        return 'class %s(%s) extends %s {\n%s}\n' % (
+            self.random.choice(TYPES),
+            fields,
+            self.random.choice(TYPES),
+            methods)
+
+    def program_part(self):
+        choice = self.random.random()
+        if choice < 0.1:
+            return self.comment('')
+        elif choice < 0.6:
+            return self.class_definition()
+        return self.function('')
+
+    def category_part(self, category):
+        if category == 'program':
+            return self.program_part()
+        elif category == 'identifiers':
+            return ' '.join(self.identifier() for _ in range(10)) + '\n'
+        elif category == 'numbers':
+            return ', '.join(self.number() for _ in range(10)) + '\n'
+        elif category == 'strings':
+            return ', '.join(self.string() for _ in range(4)) + '\n'
+        elif category == 'operators':
+            return ' '.join(
+                self.random.choice(BINARY_OPERATORS + ASSIGNMENT_OPERATORS)
+                for _ in range(20)) + '\n'
+        elif category == 'delimiters':
+            return ''.join(
+                self.random.choice('{}[]():,') for _ in range(40)) + '\n'
+        raise ValueError('Unknown corpus category: %s.' % category)
+
+    def generate(self, category, size):
+        # whole parts are appended until the corpus reaches `size` characters
+        parts = []
+        length = 0
+        while length < size:
+            part = self.category_part(category)
+            parts.append(part)
+            length += len(part)
+        return ''.join(parts)
@@ -0,0 +1,92 @@
+import argparse
+import json
+import platform
+import sys
+from timeit import default_timer
+
+from benchmarks.corpus import CorpusGenerator
+from src.lexer import Lexer
+from src.regex_lexer import RegexLexer
+
+LEXERS = {
+    'dispatch': Lexer,
+    'regex': RegexLexer,
+}
+DEFAULT_SIZES = [10 * 1024, 100 * 1024, 1024 * 1024]
+
+def measure(lexer_class, source, repeat):
+    # best of `repeat` runs, which is the least disturbed by other load
+    best = None
+    for _ in range(repeat):
+        start = default_timer()
+        tokens = lexer_class(source).tokenize()
+        elapsed = default_timer() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return len(tokens), best
+
+def run(lexer_name, categories, sizes, seed, repeat):
+    results = []
+    for category in categories:
+        for size in sizes:
+            source = CorpusGenerator(seed).generate(category, size)
+            token_count, seconds = measure(LEXERS[lexer_name], source, repeat)
+            seconds = max(seconds, 1e-9)
+            results.append({
+                'category': category,
+                'size': size,
+                'characters': len(source),
+                'tokens': token_count,
+                'seconds': seconds,
+                'tokens_per_second': token_count / seconds,
+                'mb_per_second': len(source) / seconds / (1024 * 1024),
+            })
+    return {
+        'lexer': lexer_name,
+        'seed': seed,
+        'repeat': repeat,
+        'python': platform.python_version(),
+        'results': results,
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description='Measure lexer throughput on a generated Blink corpus.')
+    parser.add_argument(
+        '--lexer', choices=sorted(LEXERS), default='dispatch')
+    parser.add_argument(
+        '--category', action='append', choices=CorpusGenerator.CATEGORIES,
+        help='corpus categories to run (default: all)')
+    parser.add_argument(
+        '--size', action='append', type=int,
+        help='corpus sizes in characters (default: 10K, 100K and 1M)')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument(
+        '--output', help='write the JSON results here instead of stdout')
+    arguments = parser.parse_args(argv)
+
+    report = run(
+        arguments.lexer,
+        arguments.category or list(CorpusGenerator.CATEGORIES),
+        arguments.size or DEFAULT_SIZES,
+        arguments.seed,
+        arguments.repeat)
+
+    for result in report['results']:
+        sys.stderr.write('%-12s %9d chars %8d tokens %10.0f tokens/s %6.2f MB/s\n' % (
+            result['category'],
+            result['characters'],
+            result['tokens'],
+            result['tokens_per_second'],
+            result['mb_per_second']))
+
+    output = json.dumps(report, indent=2, sort_keys=True)
+    if arguments.output:
+        with open(arguments.output, 'w') as output_file:
+            output_file.write(output + '\n')
+    else:
+        sys.stdout.write(output + '\n')
+
+if __name__ == '__main__':
+    main()
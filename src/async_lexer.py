@@ -0,0 +1,101 @@
+# Python 3 only: this module uses async/await syntax
+import asyncio
+import codecs
+from timeit import default_timer
+
+from .stream_lexer import StreamLexer
+from .token_types import TokenType
+
+class InputNeeded(Exception):
+
+    def __init__(self, minimum):
+        super(InputNeeded, self).__init__(minimum)
+        self.minimum = minimum
+
+class AsyncLexer(StreamLexer):
+
+    DEFAULT_YIELD_TOKENS = 1000
+    DEFAULT_YIELD_MICROSECONDS = 2000
+
+    def __init__(self, source, chunk_size=StreamLexer.DEFAULT_CHUNK_SIZE,
+        yield_tokens=DEFAULT_YIELD_TOKENS,
+        yield_microseconds=DEFAULT_YIELD_MICROSECONDS,
+        encoding='utf-8', **options):
+        super(AsyncLexer, self).__init__((), chunk_size, **options)
+        # an asyncio.StreamReader, or any async iterator of str or bytes
+        self.source = source
+        self.decoder = codecs.getincrementaldecoder(encoding)()
+        self.yield_tokens = yield_tokens
+        self.yield_interval = yield_microseconds / 1000000.0
+        self.finished = False
+
+    def _fill(self, minimum=1):
+        # StreamLexer has already rewound to the start of the token, so the
+        # chunks can be awaited and the token lexed again
+        raise InputNeeded(minimum)
+
+    async def _read_chunk(self):
+        if hasattr(self.source, 'read'):
+            return await self.source.read(self.chunk_size)
+        try:
+            return await self.source.__anext__()
+        except StopAsyncIteration:
+            return b''
+
+    async def _read(self, minimum=1):
+        # like StreamLexer._fill, reads at least `minimum` more characters and
+        # joins them once, so a long token is only rescanned a logarithmic
+        # number of times
+        pieces = [self.input]
+        length = 0
+        while True:
+            chunk = await self._read_chunk()
+
+            # a chunk can end partway through a character and decode to
+            # nothing, so only an empty read ends the input
+            text = chunk
+            if isinstance(chunk, bytes):
+                text = self.decoder.decode(chunk, final=not chunk)
+            if text:
+                pieces.append(text)
+                length += len(text)
+            if not chunk:
+                self.exhausted = True
+                break
+            if length >= minimum:
+                break
+        self.input = ''.join(pieces)
+
+    def __aiter__(self):
+        self.pending_tokens = 0
+        self.last_yield = default_timer()
+        return self
+
+    async def __anext__(self):
+        if self.finished:
+            raise StopAsyncIteration
+
+        while True:
+            try:
+                token = self.next_token()
+                break
+            except InputNeeded as needed:
+                await self._read(needed.minimum)
+
+        if token is None:
+            raise ValueError('Invalid token at line %d, column %d.' % (
+                self.line, self.column))
+        if token.type is TokenType.END_OF_INPUT:
+            self.finished = True
+            raise StopAsyncIteration
+
+        # hand the loop back regularly even when every chunk is already
+        # buffered and no read ever has to wait
+        self.pending_tokens += 1
+        if (self.pending_tokens >= self.yield_tokens or
+            default_timer() - self.last_yield >= self.yield_interval):
+            await asyncio.sleep(0)
+            self.pending_tokens = 0
+            self.last_yield = default_timer()
+
+        return token
@@ -0,0 +1,60 @@
+from .lexer import Lexer
+from .token_buffer import TokenBuffer
+
+class BatchLexer(object):
+
+    def __init__(self, lexer_class=Lexer, recover=False):
+        # one lexer, and with it one symbol table, serves every snippet
+        self.lexer = lexer_class('', recover=recover)
+
+    def lex(self, source):
+        # when recovering nothing is raised, and a snippet's diagnostics
+        # take the place of the error
+        self.lexer.reset(source)
+        try:
+            tokens = self.lexer.tokenize()
+        except ValueError as error:
+            return (None, error)
+        return (tokens, self.lexer.diagnostics or None)
+
+    def lex_batch(self, sources):
+        return [self.lex(source) for source in sources]
+
+    def lex_batch_buffer(self, sources):
+        # every snippet lands in one TokenBuffer over the concatenated
+        # sources; boundaries[i]:boundaries[i + 1] are the tokens of snippet i
+        lexer = self.lexer
+        pieces = []
+        boundaries = [0]
+        errors = []
+        buffer = TokenBuffer(None)
+        offset = 0
+
+        for source in sources:
+            lexer.reset(source)
+            count = len(buffer)
+            try:
+                for token in lexer.iter_tokens():
+                    buffer.append(
+                        token.type,
+                        offset + token.start,
+                        token.end - token.start,
+                        token.line,
+                        token.column)
+                errors.append(lexer.diagnostics or None)
+            except ValueError as error:
+                buffer.truncate(count)
+                errors.append(error)
+
+            pieces.append(source)
+            offset += len(source)
+            boundaries.append(len(buffer))
+
+        buffer.source = ''.join(pieces)
+        return (buffer, boundaries, errors)
+
+def lex_batch(sources, lexer_class=Lexer, combined=False, recover=False):
+    batch = BatchLexer(lexer_class, recover)
+    if combined:
+        return batch.lex_batch_buffer(sources)
+    return batch.lex_batch(sources)
@@ -0,0 +1,11 @@
+from .mapped_lexer import MappedLexer
+from .token import BytesToken
+
+class BytesLexer(MappedLexer):
+
+    # MappedLexer's byte patterns do the matching, so no per-character str
+    # objects are built; token values come back as decoded text rather than
+    # views, but only once they are read
+    def make_token(self, token_type, start, end, line, column, value=None):
+        return BytesToken(
+            token_type, None, line, column, self.input, start, end)
@@ -22,6 +22,12 @@ class CharUtils(object):
     IDENTIFIER_TYPES = (
         [CharType.LETTER, CharType.UNDERSCORE, CharType.OPERATOR] + DIGIT_TYPES)
 
+    # populated from classify_reference once the class body is complete
+    CHAR_TYPE_TABLE = {}
+    DIGIT_CHARACTERS = frozenset()
+    NUMBER_CHARACTERS = frozenset()
+    IDENTIFIER_CHARACTERS = frozenset()
+
     @staticmethod
     def _is_zero(char):
         return char == '0'
@@ -40,7 +46,8 @@ class CharUtils(object):
 
     @staticmethod
     def _is_newline(char):
-        return char == '\n'
+        # `\r` only starts a newline when a `\n` follows it
+        return char == '\n' or char == '\r'
 
     @staticmethod
     def _is_positive_digit(char):
@@ -64,15 +71,19 @@ class CharUtils(object):
 
     @staticmethod
     def is_whitespace(char):
-        return char == ' '
+        return char == ' ' or char == '\t'
 
     @staticmethod
     def is_valid_number_character(char):
-        return (char in CharUtils.DECIMAL_SPECIAL_CHARACTERS or
-            CharUtils.classify(char) in CharUtils.DIGIT_TYPES)
+        return char in CharUtils.NUMBER_CHARACTERS
 
     @staticmethod
     def classify(char):
+        return CharUtils.CHAR_TYPE_TABLE.get(char, CharType.UNRECOGNIZED)
+
+    @staticmethod
+    def classify_reference(char):
+        # predicate chain kept as the reference the lookup table is built from
 
         if not char:
             return CharType.UNRECOGNIZED
@@ -99,3 +110,20 @@ class CharUtils(object):
             return CharType.OPERATOR
 
         return CharType.UNRECOGNIZED
+
+def _build_tables():
+    table = {}
+    for code in range(128):
+        char = chr(code)
+        table[char] = CharUtils.classify_reference(char)
+
+    CharUtils.CHAR_TYPE_TABLE = table
+    CharUtils.DIGIT_CHARACTERS = frozenset(
+        c for c, t in table.items() if t in CharUtils.DIGIT_TYPES)
+    CharUtils.NUMBER_CHARACTERS = (
+        CharUtils.DIGIT_CHARACTERS |
+        frozenset(CharUtils.DECIMAL_SPECIAL_CHARACTERS))
+    CharUtils.IDENTIFIER_CHARACTERS = frozenset(
+        c for c, t in table.items() if t in CharUtils.IDENTIFIER_TYPES)
+
+_build_tables()
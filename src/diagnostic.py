@@ -0,0 +1,13 @@
+class Diagnostic(object):
+    __slots__ = ('message', 'line', 'column', 'start', 'end')
+
+    def __init__(self, message, line, column, start, end):
+        self.message = message
+        self.line = line
+        self.column = column
+        self.start = start
+        self.end = end
+
+    def __repr__(self):
+        return 'Diagnostic(%r, line=%d, column=%d)' % (
+            self.message, self.line, self.column)
@@ -0,0 +1,240 @@
+from .lexer import Lexer
+from .token_types import TokenType
+
+class SourceText(object):
+    __slots__ = ('text',)
+
+    # tokens slice their values out of this holder, so swapping the text
+    # after an edit keeps every untouched token in front of it valid
+
+    def __init__(self, text):
+        self.text = text
+
+    def __getitem__(self, index):
+        return self.text[index]
+
+    def __len__(self):
+        return len(self.text)
+
+class IncrementalLexer(object):
+
+    def __init__(self, source, lexer_class=Lexer, **options):
+        # text being edited is routinely invalid halfway through a change,
+        # so malformed input becomes UNRECOGNIZED tokens unless asked not to
+        options.setdefault('recover', True)
+        self.lexer_class = lexer_class
+        self.options = options
+        self.text = SourceText(source)
+
+        lexer = lexer_class(source, **options)
+        self.symbols = lexer.symbols
+        self._tokens = self._attach(lexer.tokenize())
+
+        # an edit moves every token after it; the tokens from _pending on
+        # are only moved by _delta characters and _line_delta lines when
+        # they are read through tokens or indexing. Edits close together stay
+        # cheap, but the first edit after jumping far away still walks the
+        # tokens in between
+        self._pending = len(self._tokens)
+        self._delta = 0
+        self._line_delta = 0
+        self.unterminated = self._find_unterminated(0, len(self._tokens))
+
+    @property
+    def source(self):
+        return self.text.text
+
+    @property
+    def tokens(self):
+        self._apply_pending(len(self._tokens))
+        return self._tokens
+
+    def __len__(self):
+        return len(self._tokens)
+
+    def __getitem__(self, index):
+        # only the tokens up to the ones asked for are brought up to date
+        if isinstance(index, slice):
+            start, stop, _ = index.indices(len(self._tokens))
+            self._apply_pending(max(start + 1, stop))
+        else:
+            if index < 0:
+                index += len(self._tokens)
+            self._apply_pending(index + 1)
+        return self._tokens[index]
+
+    def __iter__(self):
+        return iter(self.tokens)
+
+    def _apply_pending(self, stop):
+        tokens = self._tokens
+        stop = min(stop, len(tokens))
+        if stop <= self._pending:
+            return
+
+        delta, line_delta = self._delta, self._line_delta
+        if delta or line_delta:
+            for index in range(self._pending, stop):
+                token = tokens[index]
+                token.start += delta
+                token.end += delta
+                token.line += line_delta
+        self._pending = stop
+
+    def _start(self, index):
+        start = self._tokens[index].start
+        return start + self._delta if index >= self._pending else start
+
+    def _end(self, index):
+        end = self._tokens[index].end
+        return end + self._delta if index >= self._pending else end
+
+    def _line(self, index):
+        line = self._tokens[index].line
+        return line + self._line_delta if index >= self._pending else line
+
+    def _attach(self, tokens):
+        for token in tokens:
+            if token.source is not None:
+                token.source = self.text
+        return tokens
+
+    def _find_unterminated(self, start, stop):
+        # the offset of the first string left without its closing quote, which
+        # the lexer recovers from as an UNRECOGNIZED token
+        tokens = self._tokens
+        source = self.source
+        for index in range(start, stop):
+            if (tokens[index].type is TokenType.UNRECOGNIZED and
+                source[self._start(index)] == '"'):
+                return self._start(index)
+        return None
+
+    def _may_close_string(self, offset, old_end, inserted_text):
+        # where a string ends only depends on its quotes and backslashes, on
+        # which character follows each backslash, and on whether the text
+        # ends with a quote
+        changed = self.source[offset:old_end] + inserted_text
+        return ('"' in changed or '\\' in changed or
+            self.source[offset - 1:offset] == '\\' or
+            old_end == len(self.source))
+
+    def _first_affected_token(self, offset):
+        # tokens ending before the edit were terminated by a character that
+        # the edit does not touch, so they lex the same way afterwards
+        low, high = 0, len(self._tokens)
+        while low < high:
+            middle = (low + high) // 2
+            if self._end(middle) < offset:
+                low = middle + 1
+            else:
+                high = middle
+
+        # except a kept comment, which only stops at a carriage return when a
+        # line feed comes right after it
+        if (low > 0 and self._tokens[low - 1].type is TokenType.COMMENT and
+            self._end(low - 1) + 1 == offset):
+            low -= 1
+        return low
+
+    def _restart_lexer(self, source, first):
+        lexer = self.lexer_class(source, self.symbols, **self.options)
+        if first > 0:
+            previous = self._tokens[first - 1]
+            lexer.position = previous.end
+            if previous.type is TokenType.NEWLINE:
+                lexer.line = previous.line + 1
+                lexer.column = 0
+            else:
+                lexer.line = previous.line
+                lexer.column = previous.column + previous.end - previous.start
+        return lexer
+
+    def edit(self, offset, removed_length, inserted_text):
+        tokens = self._tokens
+        old_end = offset + removed_length
+        new_end = offset + len(inserted_text)
+        delta = new_end - old_end
+        source = self.source[:offset] + inserted_text + self.source[old_end:]
+
+        first = self._first_affected_token(offset)
+        unterminated = self.unterminated
+        if (unterminated is not None and unterminated < offset and
+            self._may_close_string(offset, old_end, inserted_text)):
+            # a string left open runs on to the end of the text, so the edit
+            # can close it however far away it is
+            first = min(first, self._first_affected_token(unterminated + 1))
+        first_start = (self._start(first) if first < len(tokens)
+            else len(self.source))
+        self._apply_pending(first)
+        lexer = self._restart_lexer(source, first)
+
+        new_tokens = []
+        resync = len(tokens)
+        resync_start = None
+        old_index = first
+        for token in lexer.iter_tokens():
+            old_start = token.start - delta
+            while (old_index < len(tokens) and
+                (self._start(old_index) < old_start or
+                self._start(old_index) < old_end)):
+                old_index += 1
+
+            # once a token starts at the same place in the unchanged tail as
+            # an old token did, every following token is the same too
+            if (token.start >= new_end and old_index < len(tokens) and
+                self._start(old_index) == old_start):
+                resync = old_index
+                resync_start = old_start
+                self._shift(resync, delta, token.line, token.column)
+                break
+
+            new_tokens.append(token)
+        else:
+            # the whole tail was lexed again, so none of it owes a shift
+            self._pending = len(tokens)
+
+        self.text.text = source
+        tokens[first:resync] = self._attach(new_tokens)
+        self._pending += len(new_tokens) - (resync - first)
+
+        if unterminated is None or unterminated >= first_start:
+            stop = first + len(new_tokens)
+            found = self._find_unterminated(first, stop)
+            if found is None and unterminated is not None:
+                if resync_start is not None and unterminated >= resync_start:
+                    found = unterminated + delta
+                else:
+                    found = self._find_unterminated(stop, len(tokens))
+            self.unterminated = found
+        return (first, resync, first + len(new_tokens))
+
+    def _shift(self, resync, delta, line, column):
+        tokens = self._tokens
+        if self._pending == len(tokens):
+            self._pending = resync
+            self._delta = self._line_delta = 0
+        self._apply_pending(resync)
+
+        sync_line = self._line(resync)
+        line_delta = line - sync_line
+        column_delta = column - tokens[resync].column
+
+        if column_delta:
+            index = resync
+            while index < len(tokens) and self._line(index) == sync_line:
+                tokens[index].column += column_delta
+                index += 1
+
+        # tokens up to where an earlier edit further on left off are taken
+        # back by its shift, so that everything from here on owes both
+        old_delta, old_line_delta = self._delta, self._line_delta
+        if old_delta or old_line_delta:
+            for index in range(resync, self._pending):
+                token = tokens[index]
+                token.start -= old_delta
+                token.end -= old_delta
+                token.line -= old_line_delta
+        self._pending = resync
+        self._delta += delta
+        self._line_delta += line_delta
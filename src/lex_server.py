@@ -0,0 +1,319 @@
+import argparse
+import json
+import multiprocessing
+import os
+import socket
+import struct
+import sys
+import threading
+from timeit import default_timer
+
+try:
+    import queue
+except ImportError:
+    import Queue as queue
+
+try:
+    import socketserver
+except ImportError:
+    import SocketServer as socketserver
+
+from .lexer import Lexer
+from .token_buffer import KIND_CODES, TOKEN_TYPES
+from .token_types import TokenType
+
+# binary responses carry one fixed-size record per token:
+# kind code, start, end, line, column
+TOKEN_RECORD = struct.Struct('<BIIII')
+
+# Python 2 pools cannot report a batch that failed outside _lex_sources; its
+# requests still give up after the server's timeout
+POOL_ERROR_CALLBACKS = sys.version_info >= (3,)
+
+_worker_lexer_class = None
+
+def _init_worker(lexer_class):
+    global _worker_lexer_class
+    _worker_lexer_class = lexer_class
+    # the first lex pays for anything built lazily, before a request does
+    lexer_class('a <- 1').tokenize()
+
+def _lex_sources(sources):
+    # a fresh lexer per source, so a long-running worker does not collect
+    # every identifier it has ever seen in one symbol table
+    results = []
+    for source in sources:
+        try:
+            tokens = _worker_lexer_class(source).tokenize()
+        except Exception as error:
+            results.append((None, str(error)))
+            continue
+        results.append(([
+            (KIND_CODES[token.type], token.start, token.end, token.line,
+                token.column)
+            for token in tokens
+        ], None))
+    return results
+
+def _disable_nagle(connection):
+    if connection.family != getattr(socket, 'AF_UNIX', None):
+        connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+class _Request(object):
+    __slots__ = ('source', 'done', 'result')
+
+    def __init__(self, source):
+        self.source = source
+        self.done = threading.Event()
+        self.result = None
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+
+    def setup(self):
+        socketserver.StreamRequestHandler.setup(self)
+        _disable_nagle(self.connection)
+
+    # one JSON request per line: {"id": ..., "source": "...", "format": ...};
+    # binary responses are a JSON header line followed by `count` records
+    def handle(self):
+        for line in iter(self.rfile.readline, b''):
+            if not line.strip():
+                continue
+            try:
+                request = json.loads(line.decode('utf-8'))
+                source = request['source']
+            except (ValueError, KeyError, TypeError):
+                self.respond({'id': None, 'error': 'Malformed request.'})
+                continue
+
+            tokens, error = self.server.lex_server.submit(source)
+            tokens = tokens or ()
+            response = {'id': request.get('id'), 'error': error}
+
+            if request.get('format') == 'binary':
+                response['count'] = len(tokens)
+                self.respond(response, b''.join(
+                    TOKEN_RECORD.pack(*token) for token in tokens))
+            else:
+                response['tokens'] = [
+                    [TOKEN_TYPES[kind].name, start, end, line, column]
+                    for kind, start, end, line, column in tokens]
+                self.respond(response)
+
+    def respond(self, response, records=b''):
+        # a single write, so small responses leave in a single packet
+        self.wfile.write(
+            json.dumps(response).encode('utf-8') + b'\n' + records)
+        self.wfile.flush()
+
+class _TCPServer(socketserver.ThreadingMixIn, socketserver.TCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+if hasattr(socketserver, 'UnixStreamServer'):
+    class _UnixServer(socketserver.ThreadingMixIn,
+        socketserver.UnixStreamServer):
+        daemon_threads = True
+
+class LexServer(object):
+
+    DEFAULT_BATCH_SIZE = 64
+    DEFAULT_BATCH_DELAY = 0
+    DEFAULT_TIMEOUT = 60
+
+    def __init__(self, address, processes=None, lexer_class=Lexer,
+        batch_size=DEFAULT_BATCH_SIZE, batch_delay=DEFAULT_BATCH_DELAY,
+        timeout=DEFAULT_TIMEOUT):
+        # a (host, port) pair listens on TCP, a string is a Unix socket path;
+        # processes=0 lexes in the server process itself
+        self.requested_address = address
+        self.processes = (processes if processes is not None
+            else multiprocessing.cpu_count())
+        self.lexer_class = lexer_class
+        self.batch_size = batch_size
+        self.batch_delay = batch_delay
+        self.timeout = timeout
+        self.requests = queue.Queue()
+        # requests submitted and not answered yet
+        self.pending = set()
+        self.pending_lock = threading.Lock()
+        self.pool = None
+        self.server = None
+        self.threads = []
+
+    @property
+    def address(self):
+        return self.server.server_address
+
+    def start(self):
+        # workers are forked and warmed before any thread is started
+        if self.processes:
+            self.pool = multiprocessing.Pool(
+                self.processes, _init_worker, (self.lexer_class,))
+        else:
+            _init_worker(self.lexer_class)
+
+        if isinstance(self.requested_address, tuple):
+            self.server = _TCPServer(self.requested_address, _RequestHandler)
+        else:
+            self.server = _UnixServer(self.requested_address, _RequestHandler)
+        self.server.lex_server = self
+
+        for target in [self.server.serve_forever, self._dispatch]:
+            thread = threading.Thread(target=target)
+            thread.daemon = True
+            thread.start()
+            self.threads.append(thread)
+        return self
+
+    def submit(self, source):
+        request = _Request(source)
+        with self.pending_lock:
+            self.pending.add(request)
+        self.requests.put(request)
+
+        # a worker that dies takes its batch with it, and no answer would
+        # ever arrive
+        if not request.done.wait(self.timeout):
+            self._fail([request], 'Lexing timed out.')
+        return request.result
+
+    def _dispatch(self):
+        while True:
+            request = self.requests.get()
+            if request is None:
+                return
+
+            # requests already waiting, and whatever arrives within
+            # batch_delay of the first one, go to a worker together
+            batch = [request]
+            deadline = default_timer() + self.batch_delay
+            try:
+                while len(batch) < self.batch_size:
+                    remaining = deadline - default_timer()
+                    if remaining > 0:
+                        request = self.requests.get(timeout=remaining)
+                    else:
+                        request = self.requests.get_nowait()
+                    if request is None:
+                        self.requests.put(None)
+                        break
+                    batch.append(request)
+            except queue.Empty:
+                pass
+
+            sources = [request.source for request in batch]
+            if self.pool is None:
+                self._complete(batch, _lex_sources(sources))
+            else:
+                callbacks = {
+                    'callback': lambda results, batch=batch: self._complete(
+                        batch, results)}
+                if POOL_ERROR_CALLBACKS:
+                    callbacks['error_callback'] = (
+                        lambda error, batch=batch: self._fail(
+                            batch, 'Lexing failed: %s' % error))
+                self.pool.apply_async(_lex_sources, (sources,), **callbacks)
+
+    def _complete(self, batch, results):
+        # the first answer wins, whether a result, a failure or a timeout
+        with self.pending_lock:
+            for request, result in zip(batch, results):
+                if request in self.pending:
+                    self.pending.remove(request)
+                    request.result = result
+                    request.done.set()
+
+    def _fail(self, batch, error):
+        self._complete(batch, [(None, error)] * len(batch))
+
+    def serve_forever(self):
+        self.start()
+        try:
+            while True:
+                self.threads[0].join(1)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.close()
+
+    def close(self):
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+            self.requests.put(None)
+            if not isinstance(self.requested_address, tuple):
+                os.remove(self.requested_address)
+            self.server = None
+
+        # a batch lost with its worker would keep the pool from ever joining
+        self._fail(list(self.pending), 'Server closed.')
+        if self.pool is not None:
+            self.pool.terminate()
+            self.pool.join()
+            self.pool = None
+
+class LexClient(object):
+
+    def __init__(self, address):
+        family = (socket.AF_INET if isinstance(address, tuple)
+            else socket.AF_UNIX)
+        self.socket = socket.socket(family, socket.SOCK_STREAM)
+        self.socket.connect(address)
+        _disable_nagle(self.socket)
+        self.file = self.socket.makefile('rwb')
+        self.next_id = 0
+
+    def tokenize(self, source, binary=False):
+        # (token type, start, end, line, column) for every token in source
+        self.next_id += 1
+        request = {'id': self.next_id, 'source': source}
+        if binary:
+            request['format'] = 'binary'
+        self.file.write(json.dumps(request).encode('utf-8') + b'\n')
+        self.file.flush()
+
+        response = json.loads(self.file.readline().decode('utf-8'))
+        if binary:
+            data = self.file.read(response['count'] * TOKEN_RECORD.size)
+            records = [
+                TOKEN_RECORD.unpack_from(data, offset)
+                for offset in range(0, len(data), TOKEN_RECORD.size)]
+            tokens = [
+                (TOKEN_TYPES[record[0]],) + record[1:] for record in records]
+        else:
+            tokens = [
+                (TokenType[token[0]],) + tuple(token[1:])
+                for token in response['tokens']]
+
+        if response['error'] is not None:
+            raise ValueError(response['error'])
+        return tokens
+
+    def close(self):
+        self.file.close()
+        self.socket.close()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description='Serve lexing requests from a pool of warm workers.')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument(
+        '--unix', help='listen on this Unix socket path instead of TCP')
+    parser.add_argument('--processes', type=int)
+    parser.add_argument(
+        '--batch-size', type=int, default=LexServer.DEFAULT_BATCH_SIZE)
+    parser.add_argument(
+        '--timeout', type=float, default=LexServer.DEFAULT_TIMEOUT,
+        help='seconds a request waits for its batch before failing')
+    arguments = parser.parse_args(argv)
+
+    LexServer(
+        arguments.unix or (arguments.host, arguments.port),
+        arguments.processes,
+        batch_size=arguments.batch_size,
+        timeout=arguments.timeout).serve_forever()
+
+if __name__ == '__main__':
+    main()
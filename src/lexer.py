@@ -1,7 +1,13 @@
-from char_utils import CharType, CharUtils
-from token import Token
-from tokenizers import Tokenizer
-from token_types import TokenType
+import re
+
+from .char_utils import CharType, CharUtils
+from .diagnostic import Diagnostic
+from .lexer_profile import LexerProfile
+from .line_index import LineIndex
+from .symbol_table import SymbolTable
+from .token import Token
+from .tokenizers import Tokenizer
+from .token_types import KEYWORD_TO_TOKEN_TYPE_MAP, TokenType
 
 class Lexer(object):
 
@@ -17,11 +23,67 @@ class Lexer(object):
         CharType.NEWLINE: Tokenizer.tokenize_newline,
     }
 
-    def __init__(self, input):
+    # what tokenize_operator hands a `.` starting a number and a kept `//`
+    # comment over to; looked up on the lexer, so a LexerProfile can count
+    # them under their own category
+    nested_tokenizer_map = {
+        'number': Tokenizer.tokenize_number,
+        'comment': Tokenizer.tokenize_comment,
+    }
+
+    KEYWORD_TO_TOKEN_TYPE_MAP = KEYWORD_TO_TOKEN_TYPE_MAP
+
+    # whether next_token goes through tokenizer_map and skip_whitespace,
+    # which is where a LexerProfile hooks in
+    DISPATCHES_TOKENIZERS = True
+
+    # trivia is skipped a whole run at a time; a comment runs up to, but not
+    # including, the newline that ends it
+    COMMENT_PATTERN = re.compile(r'//(?:[^\r\n]|\r(?!\n))*')
+    WHITESPACE_PATTERN = re.compile(r'[ \t]*')
+    TRIVIA_PATTERN = re.compile(
+        WHITESPACE_PATTERN.pattern + '(?:' + COMMENT_PATTERN.pattern + ')?')
+
+    # how far an invalid token extends when recovering; built from the
+    # tokenizer map at the end of the module
+    RESYNC_PATTERN = None
+    RESYNC_MESSAGES = {
+        'STRING': 'Unterminated string.',
+        'NUMBER': 'Malformed number.',
+        'CHARACTERS': 'Unrecognized character.',
+        'OTHER': 'Unrecognized character.',
+    }
+
+    def __init__(self, input, symbols=None, recover=False,
+        keep_comments=False):
         self.input = input
         self.position = 0
         self.line = 0
         self.column = 0
+        self.symbols = (symbols if symbols is not None
+            else SymbolTable(self.KEYWORD_TO_TOKEN_TYPE_MAP))
+        self._line_index = None
+        self.recover = recover
+        self.diagnostics = []
+        self.keep_comments = keep_comments
+
+    def reset(self, input):
+        self.input = input
+        self.position = 0
+        self.line = 0
+        self.column = 0
+        self._line_index = None
+        self.diagnostics = []
+
+    def enable_profiling(self, profile=None):
+        profile = profile if profile is not None else LexerProfile()
+        profile.attach(self)
+        return profile
+
+    def line_index(self):
+        if self._line_index is None:
+            self._line_index = LineIndex(self.input)
+        return self._line_index
 
     def current_char(self):
         if self.position >= len(self.input):
@@ -45,32 +107,79 @@ class Lexer(object):
         return (self.input[next_position] if next_position < len(self.input)
             else None)
 
+    def make_token(self, token_type, start, end, line, column, value=None):
+        return Token(token_type, value, line, column, self.input, start, end)
+
     def skip_whitespace(self):
-        while (self.position < len(self.input) and
-            CharUtils.is_whitespace(self.input[self.position])):
-            self.move_right()
+        pattern = (self.WHITESPACE_PATTERN if self.keep_comments
+            else self.TRIVIA_PATTERN)
+        end = pattern.match(self.input, self.position).end()
+        self.column += end - self.position
+        self.position = end
 
     def next_token(self):
 
+        self.skip_whitespace()
+
         if self.position >= len(self.input):
             return Token(TokenType.END_OF_INPUT, None, None, None)
 
-        self.skip_whitespace()
-
         char = self.input[self.position]
         tokenizer_func = self.tokenizer_map.get(CharUtils.classify(char), None)
 
         if not tokenizer_func:
+            if self.recover:
+                return self.recover_token()
             raise ValueError('Token not in tokenizer map.')
 
-        return tokenizer_func(self, char)
-
-    def tokenize(self):
-        tokens = []
+        return tokenizer_func(self, char) or self.recover_token()
+
+    def recover_token(self):
+        # skips the invalid input up to where lexing can sensibly resume and
+        # stands in for it with one UNRECOGNIZED token
+        if not self.recover:
+            return None
+
+        start, line, column = self.position, self.line, self.column
+        match = self.RESYNC_PATTERN.match(self.input, start)
+        self.move_right_n(match.end() - start)
+
+        token = self.make_token(
+            TokenType.UNRECOGNIZED, start, self.position, line, column)
+        self.diagnostics.append(Diagnostic(
+            self.RESYNC_MESSAGES[match.lastgroup],
+            line,
+            column,
+            token.start,
+            token.end))
+        return token
+
+    def iter_tokens(self):
         token = self.next_token()
 
-        while (token.type is not TokenType.END_OF_INPUT):
-            tokens.append(token)
+        while (token is None or token.type is not TokenType.END_OF_INPUT):
+            if token is None:
+                raise ValueError('Invalid token at line %d, column %d.' % (
+                    self.line, self.column))
+            yield token
             token = self.next_token()
 
-        return tokens
+    def __iter__(self):
+        return self.iter_tokens()
+
+    def tokenize(self):
+        return list(self.iter_tokens())
+
+def _build_resync_pattern(tokenizer_map):
+    # a run of characters that cannot start a token is skipped as a whole
+    starts = ''.join(sorted(
+        char for char, char_type in CharUtils.CHAR_TYPE_TABLE.items()
+        if char_type in tokenizer_map or CharUtils.is_whitespace(char)))
+    return (
+        r'(?P<STRING>"[^\n]*)'
+        r'|(?P<NUMBER>[0-9.][0-9Ee+\-.]*)'
+        r'|(?P<CHARACTERS>[^' + re.escape(starts) + r']+)'
+        r'|(?P<OTHER>.)')
+
+Lexer.RESYNC_PATTERN = re.compile(
+    _build_resync_pattern(Lexer.tokenizer_map), re.DOTALL)
@@ -0,0 +1,86 @@
+from timeit import default_timer
+
+class LexerProfile(object):
+
+    COLUMN_NAMES = ('calls', 'characters', 'seconds')
+
+    def __init__(self):
+        # category -> [calls, characters consumed, cumulative seconds]
+        self.stats = {}
+        # one entry per profiled call in progress, set once it hands the
+        # token over to another profiled tokenizer
+        self.handed_over = []
+
+    def record(self, category, characters, seconds):
+        stats = self.stats.get(category, None)
+        if stats is None:
+            stats = self.stats[category] = [0, 0, 0.0]
+        stats[0] += 1
+        stats[1] += characters
+        stats[2] += seconds
+
+    def wrap(self, category, function):
+        record = self.record
+        handed_over = self.handed_over
+
+        def profiled(lexer, *args):
+            position = lexer.position
+            handed_over.append(False)
+            start = default_timer()
+            try:
+                return function(lexer, *args)
+            finally:
+                seconds = default_timer() - start
+                # a tokenizer that handed over is left to the one that took
+                # the token, so nothing is counted twice
+                if not handed_over.pop():
+                    record(category, lexer.position - position, seconds)
+                if handed_over:
+                    handed_over[-1] = True
+
+        return profiled
+
+    def attach(self, lexer):
+        if not lexer.DISPATCHES_TOKENIZERS:
+            raise TypeError('%s cannot be profiled.' % type(lexer).__name__)
+
+        # the wrappers live on the instance only, so lexers that are not
+        # being profiled keep the plain class-level dispatch
+        wrapped = {}
+        tokenizer_map = {}
+        for char_type, function in lexer.tokenizer_map.items():
+            if function not in wrapped:
+                category = function.__name__.replace('tokenize_', '')
+                wrapped[function] = self.wrap(category, function)
+            tokenizer_map[char_type] = wrapped[function]
+        lexer.tokenizer_map = tokenizer_map
+
+        nested_tokenizer_map = {}
+        for category, function in lexer.nested_tokenizer_map.items():
+            if function not in wrapped:
+                wrapped[function] = self.wrap(category, function)
+            nested_tokenizer_map[category] = wrapped[function]
+        lexer.nested_tokenizer_map = nested_tokenizer_map
+
+        skip_whitespace = self.wrap('whitespace', type(lexer).skip_whitespace)
+        lexer.skip_whitespace = lambda: skip_whitespace(lexer)
+        return lexer
+
+    def report(self):
+        return dict(
+            (category, dict(zip(self.COLUMN_NAMES, stats)))
+            for category, stats in self.stats.items())
+
+    def table(self):
+        total = sum(stats[2] for stats in self.stats.values()) or 1.0
+        lines = ['%-12s %10s %12s %10s %7s' % (
+            'category', 'calls', 'characters', 'seconds', 'time')]
+        for category, stats in sorted(
+                self.stats.items(), key=lambda item: -item[1][2]):
+            lines.append('%-12s %10d %12d %10.4f %6.1f%%' % (
+                category, stats[0], stats[1], stats[2],
+                100.0 * stats[2] / total))
+        return '\n'.join(lines)
+
+    def reset(self):
+        self.stats.clear()
@@ -0,0 +1,35 @@
+from bisect import bisect_right
+
+class LineIndex(object):
+
+    def __init__(self, source, newline='\n'):
+        self.length = len(source)
+        self.line_starts = [0]
+
+        find = source.find
+        position = find(newline)
+        while position != -1:
+            self.line_starts.append(position + len(newline))
+            position = find(newline, position + len(newline))
+
+    def __len__(self):
+        return len(self.line_starts)
+
+    def position(self, offset):
+        if not 0 <= offset <= self.length:
+            raise ValueError('Offset outside of the source.')
+
+        line = bisect_right(self.line_starts, offset) - 1
+        return (line, offset - self.line_starts[line])
+
+    def offset(self, line, column=0):
+        if not 0 <= line < len(self.line_starts):
+            raise ValueError('Line outside of the source.')
+
+        return self.line_starts[line] + column
+
+    def line_span(self, line):
+        start = self.offset(line)
+        if line + 1 < len(self.line_starts):
+            return (start, self.line_starts[line + 1])
+        return (start, self.length)
@@ -0,0 +1,81 @@
+import mmap
+import re
+
+from .line_index import LineIndex
+from .regex_lexer import RegexLexer
+from .token import Token
+
+def _encode_keys(mapping):
+    return dict((key.encode('ascii'), value) for key, value in mapping.items())
+
+def _encode_pattern(pattern):
+    # str patterns carry re.UNICODE on Python 3, which bytes patterns refuse
+    return re.compile(
+        pattern.pattern.encode('ascii'), pattern.flags & ~re.UNICODE)
+
+class MappedLexer(RegexLexer):
+
+    # the same grammar as RegexLexer, matched directly against UTF-8 bytes;
+    # columns therefore count bytes rather than characters
+    MASTER_PATTERN = _encode_pattern(RegexLexer.MASTER_PATTERN)
+    RESYNC_PATTERN = _encode_pattern(RegexLexer.RESYNC_PATTERN)
+    COMMENT_PATTERN = _encode_pattern(RegexLexer.COMMENT_PATTERN)
+    WHITESPACE_PATTERN = _encode_pattern(RegexLexer.WHITESPACE_PATTERN)
+    TRIVIA_PATTERN = _encode_pattern(RegexLexer.TRIVIA_PATTERN)
+    FIXED_TOKEN_TYPES = _encode_keys(RegexLexer.FIXED_TOKEN_TYPES)
+    KEYWORD_TO_TOKEN_TYPE_MAP = _encode_keys(
+        RegexLexer.KEYWORD_TO_TOKEN_TYPE_MAP)
+
+    def __init__(self, buffer, **options):
+        super(MappedLexer, self).__init__(buffer, **options)
+        self.mapping = None
+        try:
+            self.view = memoryview(buffer)
+        except TypeError:
+            # Python 2 mmap objects only expose the old buffer interface, so
+            # their slices are copies
+            self.view = buffer
+
+    @classmethod
+    def from_file(cls, path, **options):
+        with open(path, 'rb') as source:
+            try:
+                mapping = mmap.mmap(
+                    source.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                # empty files cannot be mapped
+                return cls(b'', **options)
+
+        lexer = cls(mapping, **options)
+        lexer.mapping = mapping
+        return lexer
+
+    def spelling(self, match, kind):
+        # bytearray and mmap matches are not hashable as they come back
+        return bytes(match.group(kind))
+
+    def line_index(self):
+        if self._line_index is None:
+            self._line_index = LineIndex(self.input, b'\n')
+        return self._line_index
+
+    def make_token(self, token_type, start, end, line, column, value=None):
+        return Token(
+            token_type, self.view[start:end], line, column, None, start, end)
+
+    def close(self):
+        # tokens are views into the mapping, which cannot be closed until
+        # they have all been dropped; until then the lexer stays usable
+        if self.mapping is None:
+            return
+        view, self.view = self.view, None
+        if isinstance(view, memoryview):
+            view.release()
+        try:
+            self.mapping.close()
+        except BufferError:
+            self.view = memoryview(self.mapping)
+            raise BufferError(
+                'Tokens still refer to the mapped file; drop them before '
+                'closing it.')
+        self.mapping = None
@@ -1,7 +1,7 @@
-from char_utils import CharType, CharUtils
+from .char_utils import CharType, CharUtils
 from enum import Enum
-from fsm import FSM
-from token_types import TokenType
+from .fsm import FSM
+from .token_types import TokenType
 
 class NumberFSM(FSM):
 
@@ -17,6 +17,8 @@ class NumberFSM(FSM):
 
     EXPONENTIAL_PREFIXES = ['E', 'e']
     SIGNS = ['+', '-']
+    # compiled from the transition methods below, see _build_transition_table
+    TRANSITION_TABLE = {}
     ACCEPTING_STATE_TO_TOKEN_MAP = {
         State.INTEGER: TokenType.INTEGER,
         State.FRACTIONAL_NUMBER: TokenType.DECIMAL,
@@ -46,7 +48,7 @@ class NumberFSM(FSM):
     def _get_initial_transition(self, char):
         if char == '.':
             return self.State.FRACTIONAL_BEGINNING
-        elif CharUtils.classify(char) in CharUtils.DIGIT_TYPES:
+        elif char in CharUtils.DIGIT_CHARACTERS:
             return self.State.INTEGER
 
         return self.State.INVALID
@@ -56,19 +58,19 @@ class NumberFSM(FSM):
             return self.State.FRACTIONAL_BEGINNING
         elif char in self.EXPONENTIAL_PREFIXES:
             return self.State.EXPONENTIAL_BEGINNING
-        elif CharUtils.classify(char) in CharUtils.DIGIT_TYPES:
+        elif char in CharUtils.DIGIT_CHARACTERS:
             return self.State.INTEGER
         return self.State.INVALID
 
     def _get_fractional_beginning_transition(self, char):
-        if CharUtils.classify(char) in CharUtils.DIGIT_TYPES:
+        if char in CharUtils.DIGIT_CHARACTERS:
             return self.State.FRACTIONAL_NUMBER
         return self.State.INVALID
 
     def _get_fractional_number_transition(self, char):
         if char in self.EXPONENTIAL_PREFIXES:
             return self.State.EXPONENTIAL_BEGINNING
-        elif CharUtils.classify(char) in CharUtils.DIGIT_TYPES:
+        elif char in CharUtils.DIGIT_CHARACTERS:
             return self.State.FRACTIONAL_NUMBER
         return self.State.INVALID
 
@@ -85,7 +87,7 @@ class NumberFSM(FSM):
         return self.State.INVALID
 
     def _get_exponential_number_transition(self, char):
-        if CharUtils.classify(char) in CharUtils.DIGIT_TYPES:
+        if char in CharUtils.DIGIT_CHARACTERS:
             return self.State.EXPONENTIAL_NUMBER
 
         return self.State.INVALID
@@ -98,21 +100,49 @@ class NumberFSM(FSM):
 
         return None
 
-    def run(self, input):
+    def scan(self, input, start=0, end=None):
+        if end is None:
+            end = len(input)
+
+        transitions = self.TRANSITION_TABLE
+        number_characters = CharUtils.NUMBER_CHARACTERS
         current_state = self.initial_state
-        output = ''
-        for c in input:
+        position = start
+        while position < end:
+            c = input[position]
             # we've hit the end of the decimal token
-            if not CharUtils.is_valid_number_character(c):
+            if c not in number_characters:
                 break
 
-            output += c
-            next_state = self.next_state(current_state, c)
-            current_state = next_state
+            current_state = transitions[current_state].get(c, None)
+            if current_state is None:
+                return (None, position)
+            position += 1
+
+        return (
+            self.ACCEPTING_STATE_TO_TOKEN_MAP.get(current_state, None),
+            position)
 
-        if current_state in self.accepting_states:
-            return (
-                self.ACCEPTING_STATE_TO_TOKEN_MAP.get(current_state, None),
-                output)
+    def run(self, input, start=0, end=None):
+        token_type, position = self.scan(input, start, end)
+
+        if token_type:
+            return (token_type, input[start:position])
 
         return (None, None)
+
+def _build_transition_table():
+    # evaluate every transition method once over the characters a number can
+    # contain; missing entries are transitions into the INVALID state
+    fsm = NumberFSM()
+    table = {}
+    for state in fsm.transition_map:
+        row = {}
+        for c in CharUtils.NUMBER_CHARACTERS:
+            next_state = fsm.next_state(state, c)
+            if next_state is not NumberFSM.State.INVALID:
+                row[c] = next_state
+        table[state] = row
+    return table
+
+NumberFSM.TRANSITION_TABLE = _build_transition_table()
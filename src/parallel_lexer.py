@@ -0,0 +1,91 @@
+import multiprocessing
+
+from .lexer import Lexer
+from .token_buffer import SymbolTokenBuffer
+
+def _lex_chunk(arguments):
+    lexer_class, text = arguments
+    lexer = lexer_class(text)
+    try:
+        buffer = SymbolTokenBuffer.from_lexer(lexer)
+    except ValueError:
+        # a malformed token, or a string cut in half by the split
+        return None
+
+    # array columns pickle as raw bytes; symbol ids are the worker's own and
+    # are sent along with its spellings, and the lines it counted, which
+    # leave out newlines inside strings, place the next chunk
+    return (lexer.symbols.spellings, lexer.line, [
+        getattr(buffer, name) for name in buffer.COLUMN_NAMES])
+
+class ParallelLexer(object):
+
+    MIN_CHUNK_SIZE = 64 * 1024
+
+    def __init__(self, source, processes=None, lexer_class=Lexer,
+        min_chunk_size=MIN_CHUNK_SIZE):
+        self.source = source
+        self.processes = processes or multiprocessing.cpu_count()
+        self.lexer_class = lexer_class
+        self.min_chunk_size = min_chunk_size
+
+    def split(self):
+        # strings cannot contain raw newlines, so every line start is a
+        # place where the lexer would be between tokens
+        source = self.source
+        chunk_size = max(
+            self.min_chunk_size, len(source) // self.processes + 1)
+
+        chunks = []
+        start = 0
+        while start < len(source):
+            end = source.find('\n', start + chunk_size - 1)
+            end = len(source) if end == -1 else end + 1
+            chunks.append((start, end))
+            start = end
+        return chunks
+
+    def tokenize(self):
+        chunks = self.split()
+        if len(chunks) < 2:
+            return SymbolTokenBuffer.from_lexer(self.lexer_class(self.source))
+
+        pool = multiprocessing.Pool(min(self.processes, len(chunks)))
+        try:
+            results = pool.map(_lex_chunk, [
+                (self.lexer_class, self.source[start:end])
+                for start, end in chunks
+            ])
+        finally:
+            pool.close()
+            pool.join()
+
+        if None in results:
+            # let the serial lexer decide what to do with the bad input
+            return SymbolTokenBuffer.from_lexer(self.lexer_class(self.source))
+
+        return self._merge(chunks, results)
+
+    def _merge(self, chunks, results):
+        # each chunk's columns are appended whole, its offsets and lines
+        # moved past the chunks before it; tokens are only built when read
+        symbols = self.lexer_class(self.source).symbols
+        buffer = SymbolTokenBuffer(self.source, symbols)
+
+        line_offset = 0
+        for (start, end), (spellings, lines, columns) in zip(chunks, results):
+            kinds, starts, lengths, token_lines, token_columns, ids = columns
+
+            # worker symbol ids index its spellings; the -1 of tokens without
+            # a symbol picks the -1 appended last
+            symbol_ids = [symbols.intern(spelling)[0] for spelling in spellings]
+            symbol_ids.append(-1)
+
+            buffer.kinds.extend(kinds)
+            buffer.starts.extend([value + start for value in starts])
+            buffer.lengths.extend(lengths)
+            buffer.lines.extend([line + line_offset for line in token_lines])
+            buffer.columns.extend(token_columns)
+            buffer.symbol_ids.extend([symbol_ids[value] for value in ids])
+            line_offset += lines
+        return buffer
@@ -0,0 +1,199 @@
+import re
+
+from .lexer import Lexer
+from .token import Token
+from .token_types import (
+    DELIMITER_TO_TOKEN_TYPE_MAP, OPERATOR_TO_TOKEN_TYPE_MAP, TokenType)
+
+def _build_operator_pattern():
+    # longer spellings first so the alternation munches maximally
+    operators = sorted(OPERATOR_TO_TOKEN_TYPE_MAP, key=len, reverse=True)
+    return '|'.join(re.escape(operator) for operator in operators)
+
+def _build_fixed_token_types():
+    token_types = dict(OPERATOR_TO_TOKEN_TYPE_MAP)
+    token_types.update(DELIMITER_TO_TOKEN_TYPE_MAP)
+    return token_types
+
+def _build_group_kinds(pattern, recover):
+    # indexed by group number: the token type of alternatives that always
+    # produce the same one, the group name of the rest and None for invalid
+    # tokens, which are left to next_token; a lone `&` or `|` is one too when
+    # recovering, so that it gets a diagnostic
+    kinds = [None] * (pattern.groups + 1)
+    for name, index in pattern.groupindex.items():
+        if name == 'UNRECOGNIZED' and recover:
+            continue
+        if name in ('INTEGER', 'DECIMAL', 'STRING', 'UNRECOGNIZED'):
+            kinds[index] = TokenType[name]
+        elif not name.startswith('INVALID_'):
+            kinds[index] = name
+    return kinds
+
+class RegexLexer(Lexer):
+
+    # every match consumes the leading whitespace and exactly one token; the
+    # alternatives mirror the tokenizers that Lexer.tokenizer_map dispatches to
+    MASTER_PATTERN = re.compile(r'''
+        [ \t]*
+        (?:
+            (?P<NEWLINE>\r?\n)
+          | (?P<DELIMITER>[{}\[\]():,])
+          | (?P<INTEGER>[0-9]+(?![0-9Ee+\-.]))
+          | (?P<DECIMAL>
+                (?:[0-9]+|[0-9]*\.[0-9]+)
+                (?:[Ee][+\-]?[1-9][0-9]*)?
+                (?![0-9Ee+\-.])
+            )
+          | (?P<INVALID_NUMBER>[0-9][0-9Ee+\-.]*|\.[0-9])
+          | (?P<IDENTIFIER>[A-Za-z_][A-Za-z0-9_+\-*/=<>!&%~$|^]*)
+          | (?P<STRING>"[^"\\]*(?:\\[\s\S][^"\\]*)*(?:"|(?<=")\Z))
+          | (?P<INVALID_STRING>")
+          | (?P<COMMENT>//(?:[^\r\n]|\r(?!\n))*)
+          | (?P<OPERATOR>''' + _build_operator_pattern() + r''')
+          | (?P<UNRECOGNIZED>[&|])
+          | (?P<END_OF_INPUT>\Z)
+        )
+    ''', re.VERBOSE)
+
+    # delimiters and operators resolved once instead of per token
+    FIXED_TOKEN_TYPES = _build_fixed_token_types()
+
+    GROUP_KINDS = _build_group_kinds(MASTER_PATTERN, False)
+    RECOVERING_GROUP_KINDS = _build_group_kinds(MASTER_PATTERN, True)
+
+    # a single match lexes each token, so there is nothing to profile
+    DISPATCHES_TOKENIZERS = False
+
+    def next_token(self):
+        match = self.MASTER_PATTERN.match(self.input, self.position)
+
+        # dropped comments cost one extra match each
+        while (match and match.lastgroup == 'COMMENT' and
+            not self.keep_comments):
+            self.column += match.end() - self.position
+            self.position = match.end()
+            match = self.MASTER_PATTERN.match(self.input, self.position)
+
+        if not match:
+            self.skip_whitespace()
+            if self.recover:
+                return self.recover_token()
+            raise ValueError('Token not in tokenizer map.')
+
+        kind = match.lastgroup
+
+        if kind == 'END_OF_INPUT':
+            self.position = match.end()
+            return Token(TokenType.END_OF_INPUT, None, None, None)
+
+        start, end = match.span(kind)
+        self.column += start - self.position
+        self.position = start
+
+        # the tokenizers return None for malformed numbers and strings,
+        # without consuming any input, and report a lone `&` or `|` like any
+        # other stray character when recovering
+        if kind.startswith('INVALID_') or (
+            kind == 'UNRECOGNIZED' and self.recover):
+            return self.recover_token()
+
+        start_line, start_column = self.line, self.column
+
+        if kind == 'NEWLINE':
+            self.next_line()
+            self.position = end
+        else:
+            self.move_right_n(end - start)
+
+        if kind == 'IDENTIFIER':
+            symbol_id, token_type, spelling = self.symbols.intern(
+                self.spelling(match, kind))
+            token = self.make_token(
+                token_type, start, end, start_line, start_column, spelling)
+            token.symbol_id = symbol_id
+            return token
+        elif kind == 'DELIMITER' or kind == 'OPERATOR':
+            token_type = self.FIXED_TOKEN_TYPES[self.spelling(match, kind)]
+        else:
+            token_type = TokenType[kind]
+
+        return self.make_token(
+            token_type, start, end, start_line, start_column)
+
+    def spelling(self, match, kind):
+        return match.group(kind)
+
+    def iter_tokens(self):
+        # next_token in one loop: the scanner resumes where its last match
+        # ended and the alternative is looked up by group number. The lexer's
+        # own position only catches up when the tokens run out, or when an
+        # invalid token is handed to next_token
+        input = self.input
+        kinds = (self.RECOVERING_GROUP_KINDS if self.recover
+            else self.GROUP_KINDS)
+        fixed_token_types = self.FIXED_TOKEN_TYPES
+        intern = self.symbols.intern
+        make_token = self.make_token
+        spelling = self.spelling
+        keep_comments = self.keep_comments
+        position, line, column = self.position, self.line, self.column
+        match_next = self.MASTER_PATTERN.scanner(input, position).match
+
+        while True:
+            match = match_next()
+            kind = kinds[match.lastindex] if match else None
+
+            if kind is None:
+                self.position, self.line, self.column = position, line, column
+                token = self.next_token()
+                if token is None:
+                    raise ValueError('Invalid token at line %d, column %d.' % (
+                        self.line, self.column))
+                if token.type is TokenType.END_OF_INPUT:
+                    return
+                yield token
+                position, line, column = (
+                    self.position, self.line, self.column)
+                match_next = self.MASTER_PATTERN.scanner(
+                    input, position).match
+                continue
+
+            index = match.lastindex
+            start = match.start(index)
+            end = match.end()
+            column += start - position
+
+            if kind == 'DELIMITER' or kind == 'OPERATOR':
+                token = make_token(
+                    fixed_token_types[spelling(match, index)],
+                    start, end, line, column)
+            elif kind == 'IDENTIFIER':
+                symbol_id, token_type, value = intern(spelling(match, index))
+                token = make_token(
+                    token_type, start, end, line, column, value)
+                token.symbol_id = symbol_id
+            elif kind == 'NEWLINE':
+                token = make_token(
+                    TokenType.NEWLINE, start, end, line, column)
+                position = end
+                line += 1
+                column = 0
+                yield token
+                continue
+            elif kind == 'COMMENT':
+                if not keep_comments:
+                    column += end - start
+                    position = end
+                    continue
+                token = make_token(
+                    TokenType.COMMENT, start, end, line, column)
+            elif kind == 'END_OF_INPUT':
+                self.position, self.line, self.column = end, line, column
+                return
+            else:
+                token = make_token(kind, start, end, line, column)
+
+            column += end - start
+            position = end
+            yield token
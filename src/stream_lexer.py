@@ -0,0 +1,111 @@
+import codecs
+
+from .lexer import Lexer
+from .token import Token
+from .token_types import TOKEN_TYPE_SPELLINGS, TokenType
+
+def _read_chunks(source, chunk_size):
+    # stops on any empty read, whether the file is opened as text or binary;
+    # Python 3 bytes are decoded as UTF-8, a character split across two
+    # reads included
+    decoder = codecs.getincrementaldecoder('utf-8')()
+    while True:
+        chunk = source.read(chunk_size)
+        if not chunk:
+            decoder.decode(b'', True)
+            return
+        if isinstance(chunk, bytes) and not isinstance(chunk, str):
+            chunk = decoder.decode(chunk)
+        yield chunk
+
+class StreamLexer(Lexer):
+    """Lexes text read a chunk at a time, keeping only the unread part.
+
+    With recover=True this can disagree with Lexer on strings that run
+    across lines. Lexer looks for the closing quote through the whole input.
+    StreamLexer only searches the buffered text, and when the quote is not
+    there it gives the string up at the end of its line as an UNRECOGNIZED
+    token instead of reading the rest of the stream. So 'a "b\\nc" d' is one
+    STRING to Lexer but can be UNRECOGNIZED, NEWLINE, IDENTIFIER and
+    UNRECOGNIZED here, depending on where the chunks end.
+    """
+
+    DEFAULT_CHUNK_SIZE = 64 * 1024
+
+    def __init__(self, source, chunk_size=DEFAULT_CHUNK_SIZE, **options):
+        super(StreamLexer, self).__init__('', **options)
+        if hasattr(source, 'read'):
+            self.chunks = _read_chunks(source, chunk_size)
+        else:
+            self.chunks = iter(source)
+        self.chunk_size = chunk_size
+        self.exhausted = False
+        # number of characters already dropped from the front of the buffer
+        self.offset = 0
+
+    def make_token(self, token_type, start, end, line, column, value=None):
+        # tokens must not hold on to a buffer that is about to be compacted
+        if value is None and token_type not in TOKEN_TYPE_SPELLINGS:
+            value = self.input[start:end]
+        return Token(
+            token_type,
+            value,
+            line,
+            column,
+            None,
+            self.offset + start,
+            self.offset + end)
+
+    def _fill(self, minimum=1):
+        # reads at least `minimum` more characters, so a token that keeps
+        # running past the end of the buffer is only rescanned a logarithmic
+        # number of times
+        pieces = [self.input]
+        length = 0
+        for chunk in self.chunks:
+            pieces.append(chunk)
+            length += len(chunk)
+            if length >= minimum:
+                break
+        else:
+            self.exhausted = True
+        self.input = self.input[:0].join(pieces)
+
+    def _cut_short(self, token):
+        # whether more input could still change the token just lexed
+        if token is None:
+            # a malformed number may be completed by the next chunk, and a
+            # failed string scan searched the whole buffer for its quote
+            match = self.RESYNC_PATTERN.match(self.input, self.position)
+            return (match.lastgroup == 'STRING' or
+                match.end() >= len(self.input))
+        return (token.type is TokenType.END_OF_INPUT or
+            self.position >= len(self.input))
+
+    def _compact(self):
+        if self.position >= self.chunk_size:
+            self.input = self.input[self.position:]
+            self.offset += self.position
+            self.position = 0
+
+    def next_token(self):
+        self._compact()
+
+        while True:
+            start_position, start_line, start_column = (
+                self.position, self.line, self.column)
+            diagnostic_count = len(self.diagnostics)
+
+            token = super(StreamLexer, self).next_token()
+
+            # a token that runs up to the end of the buffer may only be cut
+            # short by the chunk boundary; read more and lex it again from
+            # where it began. A recovered token is no different, so see the
+            # class docstring for strings left open within the buffer
+            if self.exhausted or not self._cut_short(token):
+                return token
+
+            self.position, self.line, self.column = (
+                start_position, start_line, start_column)
+            del self.diagnostics[diagnostic_count:]
+            self._fill(len(self.input) - start_position)
@@ -0,0 +1,29 @@
+from .token_types import KEYWORD_TO_TOKEN_TYPE_MAP, TokenType
+
+class SymbolTable(object):
+
+    def __init__(self, keywords=KEYWORD_TO_TOKEN_TYPE_MAP):
+        # spelling -> (symbol id, token type, shared spelling)
+        self.symbols = {}
+        self.spellings = []
+
+        # keywords come first, in a fixed order, so their ids never change
+        for keyword in sorted(keywords):
+            self.intern(keyword, keywords[keyword])
+
+    def intern(self, spelling, token_type=TokenType.IDENTIFIER):
+        symbol = self.symbols.get(spelling, None)
+        if symbol is None:
+            symbol = (len(self.spellings), token_type, spelling)
+            self.symbols[spelling] = symbol
+            self.spellings.append(spelling)
+        return symbol
+
+    def spelling(self, symbol_id):
+        return self.spellings[symbol_id]
+
+    def __contains__(self, spelling):
+        return spelling in self.symbols
+
+    def __len__(self):
+        return len(self.spellings)
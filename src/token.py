@@ -1,9 +1,136 @@
+import re
+
+from .token_types import TOKEN_TYPE_SPELLINGS, TokenType
+
+ESCAPE_PATTERN = re.compile(r'\\([\s\S])')
+ESCAPED_CHARACTERS = {
+    '"': '"',
+    '\\': '\\',
+    '/': '/',
+    'b': '\b',
+    'f': '\f',
+    'n': '\n',
+    'r': '\r',
+    't': '\t',
+}
+
+def _unescape(match):
+    # escapes the grammar does not define are left as they were written
+    char = match.group(1)
+    return ESCAPED_CHARACTERS.get(char, match.group(0))
+
+def decode_string(literal):
+    if isinstance(literal, memoryview):
+        literal = literal.tobytes()
+    if not isinstance(literal, str) and isinstance(literal, bytes):
+        literal = literal.decode('utf-8')
+
+    # drop the quotes; the unterminated strings the lexer accepts only have
+    # the opening one
+    body = literal[1:-1] if len(literal) > 1 and literal[-1] == '"' else (
+        literal[1:])
+    if '\\' not in body:
+        return body
+    return ESCAPE_PATTERN.sub(_unescape, body)
+
 class Token(object):
-    def __init__(self, type, value, line, column):
+    # `_decoded` is left unset until decoded_value is first asked for
+    __slots__ = (
+        'type', '_value', 'line', 'column', 'source', 'start', 'end',
+        'symbol_id', '_decoded')
+
+    def __init__(self, type, value, line, column,
+        source=None, start=None, end=None):
         self.type = type
-        self.value = value
+        self._value = value
         self.line = line
         self.column = column
+        self.source = source
+        self.start = start
+        self.end = end
+        self.symbol_id = None
+
+    @property
+    def value(self):
+        # fixed spellings come from a shared table and anything else is
+        # sliced out of the source the first time it is asked for
+        value = self._value
+        if value is None:
+            value = TOKEN_TYPE_SPELLINGS.get(self.type)
+            if value is None and self.source is not None:
+                value = self._value = self.source[self.start:self.end]
+        return value
+
+    @value.setter
+    def value(self, value):
+        self._value = value
+
+    @property
+    def decoded_value(self):
+        # the contents of a string literal with its escapes resolved; any
+        # other token decodes to its plain value
+        try:
+            return self._decoded
+        except AttributeError:
+            pass
+
+        if self.type is TokenType.STRING:
+            decoded = decode_string(self.value)
+        else:
+            decoded = self.value
+        self._decoded = decoded
+        return decoded
 
     def toString(self):
         return ('<%s, %s, %d: %d>' % (self.type, self.value, self.line, self.column))
+
+class BytesToken(Token):
+    # a token over UTF-8 encoded source; its text is only decoded when the
+    # value is first asked for
+    __slots__ = ()
+
+    @property
+    def value(self):
+        value = self._value
+        if value is None:
+            value = TOKEN_TYPE_SPELLINGS.get(self.type)
+            if value is None and self.source is not None:
+                value = self._value = (
+                    self.source[self.start:self.end].decode('utf-8'))
+        return value
+
+    @value.setter
+    def value(self, value):
+        self._value = value
+
+def _set_cached_attribute(token, name, value):
+    # a read-only token still fills in its text and decoded value lazily
+    if name != '_value' and name != '_decoded':
+        raise AttributeError('Token is read-only.')
+    object.__setattr__(token, name, value)
+
+class FrozenToken(Token):
+    # a token that several callers share, such as one held by LRUTokenCache
+    __slots__ = ()
+    __setattr__ = _set_cached_attribute
+
+class FrozenBytesToken(BytesToken):
+    __slots__ = ()
+    __setattr__ = _set_cached_attribute
+
+FROZEN_TOKEN_TYPES = {
+    Token: FrozenToken,
+    BytesToken: FrozenBytesToken,
+    FrozenToken: FrozenToken,
+    FrozenBytesToken: FrozenBytesToken,
+}
+
+def freeze(token):
+    frozen = object.__new__(FROZEN_TOKEN_TYPES[type(token)])
+    for name in Token.__slots__:
+        try:
+            object.__setattr__(frozen, name, getattr(token, name))
+        except AttributeError:
+            # `_decoded` before it has been computed
+            pass
+    return frozen
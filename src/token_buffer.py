@@ -0,0 +1,111 @@
+from array import array
+
+from .token import Token
+from .token_types import TokenType
+
+# TokenType values are one-element tuples; their numbers double as kind codes,
+# with 0 reserved for a missing token type
+KIND_CODES = dict((token_type, token_type.value[0]) for token_type in TokenType)
+KIND_CODES[None] = 0
+TOKEN_TYPES = dict((code, token_type) for token_type, code in KIND_CODES.items())
+
+class TokenBuffer(object):
+
+    COLUMN_NAMES = ('kinds', 'starts', 'lengths', 'lines', 'columns')
+
+    def __init__(self, source):
+        self.source = source
+        self.kinds = array('B')
+        self.starts = array('L')
+        self.lengths = array('I')
+        self.lines = array('I')
+        self.columns = array('I')
+
+    @classmethod
+    def from_lexer(cls, lexer):
+        buffer = cls(lexer.input)
+        for token in lexer.iter_tokens():
+            buffer.append(
+                token.type,
+                token.start,
+                token.end - token.start,
+                token.line,
+                token.column)
+        return buffer
+
+    def append(self, token_type, start, length, line, column):
+        self.kinds.append(KIND_CODES[token_type])
+        self.starts.append(start)
+        self.lengths.append(length)
+        self.lines.append(line)
+        self.columns.append(column)
+
+    def truncate(self, length):
+        for name in self.COLUMN_NAMES:
+            del getattr(self, name)[length:]
+
+    def token_type(self, index):
+        return TOKEN_TYPES[self.kinds[index]]
+
+    def token_value(self, index):
+        start = self.starts[index]
+        return self.source[start:start + self.lengths[index]]
+
+    def __len__(self):
+        return len(self.kinds)
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError('Token index out of range.')
+
+        start = self.starts[index]
+        return Token(
+            self.token_type(index),
+            None,
+            self.lines[index],
+            self.columns[index],
+            self.source,
+            start,
+            start + self.lengths[index])
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self[index]
+
+class SymbolTokenBuffer(TokenBuffer):
+
+    COLUMN_NAMES = TokenBuffer.COLUMN_NAMES + ('symbol_ids',)
+
+    def __init__(self, source, symbols):
+        # identifiers and keywords keep their symbol id, any other token -1
+        super(SymbolTokenBuffer, self).__init__(source)
+        self.symbols = symbols
+        self.symbol_ids = array('l')
+
+    @classmethod
+    def from_lexer(cls, lexer):
+        buffer = cls(lexer.input, lexer.symbols)
+        for token in lexer.iter_tokens():
+            buffer.append(
+                token.type,
+                token.start,
+                token.end - token.start,
+                token.line,
+                token.column,
+                token.symbol_id)
+        return buffer
+
+    def append(self, token_type, start, length, line, column, symbol_id=None):
+        super(SymbolTokenBuffer, self).append(
+            token_type, start, length, line, column)
+        self.symbol_ids.append(-1 if symbol_id is None else symbol_id)
+
+    def __getitem__(self, index):
+        token = super(SymbolTokenBuffer, self).__getitem__(index)
+        symbol_id = self.symbol_ids[index]
+        if symbol_id >= 0:
+            token.symbol_id = symbol_id
+            token.value = self.symbols.spelling(symbol_id)
+        return token
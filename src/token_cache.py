@@ -0,0 +1,187 @@
+import hashlib
+import mmap
+import os
+import struct
+import sys
+import tempfile
+from collections import OrderedDict
+
+from .lexer import Lexer
+from .token import Token, freeze
+from .token_buffer import TokenBuffer
+
+# bump whenever a change to the lexer alters the tokens it produces
+LEXER_VERSION = 3
+
+MAGIC = b'BLNKTOKS'
+FORMAT_VERSION = 1
+HEADER = struct.Struct('<8sIIB')
+COLUMN_HEADER = struct.Struct('<cB')
+
+def source_key(source, lexer_class):
+    # text is hashed as UTF-8; bytes, bytearrays, mmaps and memoryviews are
+    # hashed straight from their buffers
+    if isinstance(source, type(u'')):
+        source = source.encode('utf-8')
+
+    digest = hashlib.sha1()
+    digest.update(('%s:%d:%d:' % (
+        lexer_class.__name__, LEXER_VERSION, FORMAT_VERSION)).encode('ascii'))
+    digest.update(source)
+    return digest.hexdigest()
+
+def _to_bytes(column):
+    if hasattr(column, 'tobytes'):
+        return column.tobytes()
+    return column.tostring()
+
+def _from_bytes(column, data):
+    if hasattr(column, 'frombytes'):
+        column.frombytes(data)
+    else:
+        column.fromstring(data)
+
+class TokenCache(object):
+
+    def __init__(self, directory, lexer_class=Lexer):
+        self.directory = directory
+        self.lexer_class = lexer_class
+        self.hits = 0
+        self.misses = 0
+
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+
+    def key(self, source):
+        return source_key(source, self.lexer_class)
+
+    def path(self, source):
+        return os.path.join(self.directory, self.key(source) + '.tokens')
+
+    def tokenize(self, source):
+        buffer = self.load(source)
+        if buffer is not None:
+            self.hits += 1
+            return buffer
+
+        self.misses += 1
+        buffer = TokenBuffer.from_lexer(self.lexer_class(source))
+        self.store(source, buffer)
+        return buffer
+
+    def store(self, source, buffer):
+        columns = [getattr(buffer, name) for name in buffer.COLUMN_NAMES]
+        parts = [HEADER.pack(
+            MAGIC, FORMAT_VERSION, len(buffer), sys.byteorder == 'little')]
+        parts.extend(
+            COLUMN_HEADER.pack(column.typecode.encode('ascii'), column.itemsize)
+            for column in columns)
+        parts.extend(_to_bytes(column) for column in columns)
+
+        # write next to the final name and rename, so readers never see a
+        # partially written file
+        handle, temporary_path = tempfile.mkstemp(dir=self.directory)
+        with os.fdopen(handle, 'wb') as output:
+            output.write(b''.join(parts))
+        try:
+            os.rename(temporary_path, self.path(source))
+        except OSError:
+            os.remove(temporary_path)
+
+    def load(self, source):
+        try:
+            cache_file = open(self.path(source), 'rb')
+        except IOError:
+            return None
+
+        with cache_file:
+            try:
+                mapping = mmap.mmap(
+                    cache_file.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                return None
+
+            try:
+                return self._read(source, mapping)
+            finally:
+                mapping.close()
+
+    def _read(self, source, mapping):
+        if len(mapping) < HEADER.size:
+            return None
+
+        magic, version, count, little_endian = HEADER.unpack_from(mapping, 0)
+        if (magic != MAGIC or version != FORMAT_VERSION or
+            bool(little_endian) != (sys.byteorder == 'little')):
+            return None
+
+        buffer = TokenBuffer(source)
+        position = HEADER.size
+        if position + len(buffer.COLUMN_NAMES) * COLUMN_HEADER.size > len(
+            mapping):
+            return None
+
+        sizes = []
+        for name in buffer.COLUMN_NAMES:
+            typecode, itemsize = COLUMN_HEADER.unpack_from(mapping, position)
+            position += COLUMN_HEADER.size
+            column = getattr(buffer, name)
+            # a cache written where array item sizes differ is of no use
+            if (typecode.decode('ascii') != column.typecode or
+                itemsize != column.itemsize):
+                return None
+            sizes.append(count * itemsize)
+
+        if position + sum(sizes) != len(mapping):
+            return None
+
+        for name, size in zip(buffer.COLUMN_NAMES, sizes):
+            _from_bytes(getattr(buffer, name), mapping[position:position + size])
+            position += size
+        return buffer
+
+class LRUTokenCache(object):
+
+    # approximate footprint of one cached token and its slot in the tuple
+    TOKEN_SIZE = sys.getsizeof(Token(None, None, 0, 0)) + struct.calcsize('P')
+
+    def __init__(self, max_bytes, lexer_class=Lexer):
+        self.max_bytes = max_bytes
+        self.lexer_class = lexer_class
+        self.entries = OrderedDict()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def entry_size(self, source, tokens):
+        return len(source) + len(tokens) * self.TOKEN_SIZE
+
+    def tokenize(self, source):
+        key = source_key(source, self.lexer_class)
+        entry = self.entries.pop(key, None)
+        if entry is not None:
+            self.hits += 1
+            self.entries[key] = entry
+            return entry[0]
+
+        self.misses += 1
+        # a tuple of read-only tokens, so callers sharing the result cannot
+        # reorder, drop or change tokens under each other
+        tokens = tuple(
+            freeze(token) for token in self.lexer_class(source).tokenize())
+        size = self.entry_size(source, tokens)
+        if size > self.max_bytes:
+            return tokens
+
+        self.entries[key] = (tokens, size)
+        self.size += size
+        while self.size > self.max_bytes:
+            _, (_, evicted_size) = self.entries.popitem(last=False)
+            self.size -= evicted_size
+            self.evictions += 1
+        return tokens
+
+    def clear(self):
+        self.entries.clear()
+        self.size = 0
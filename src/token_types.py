@@ -89,47 +89,95 @@ class TokenType(Enum):
     # Special token types
     END_OF_INPUT = 68, # 'EndOfInput',
     UNRECOGNIZED = 69, # 'Unrecognized'
+    COMMENT = 70, # '//'
 
     @staticmethod
     def get_operator_token_type(operator):
-        operator_to_token_type_map = {
-            '.': TokenType.DOT,
-            '=': TokenType.EQUAL,
-            '<-': TokenType.LEFT_ARROW,
-            '->': TokenType.RIGHT_ARROW,
-            '/=': TokenType.DIV_EQUAL,
-            '-=': TokenType.MINUS_EQUAL,
-            '%=': TokenType.MOD_EQUAL,
-            '+=': TokenType.PLUS_EQUAL,
-            '*=': TokenType.TIMES_EQUAL,
-            '/': TokenType.DIV,
-            '+': TokenType.PLUS,
-            '-': TokenType.MINUS,
-            '*': TokenType.TIMES,
-            '%': TokenType.MOD,
-            '==': TokenType.DOUBLE_EQUAL,
-            '>': TokenType.GREATER,
-            '<': TokenType.LESS,
-            '>=': TokenType.GREATER_OR_EQUAL,
-            '<=': TokenType.LESS_OR_EQUAL,
-            '!': TokenType.NOT,
-            '!=': TokenType.NOT_EQUAL,
-            '&&': TokenType.AND,
-            '||': TokenType.OR,
-
-        }
-        return operator_to_token_type_map.get(operator, None)
+        return OPERATOR_TO_TOKEN_TYPE_MAP.get(operator, None)
 
     @staticmethod
     def get_delimiter_token_type(delimiter):
-        delimiter_to_token_type_map = {
-            ':': TokenType.COLON,
-            ',': TokenType.COMMA,
-            '{': TokenType.LEFT_BRACE,
-            '}': TokenType.RIGHT_BRACE,
-            '(': TokenType.LEFT_PAREN,
-            ')': TokenType.RIGHT_PAREN,
-            '[': TokenType.LEFT_BRACKET,
-            ']': TokenType.RIGHT_BRACKET,
-        }
-        return delimiter_to_token_type_map.get(delimiter, None)
+        return DELIMITER_TO_TOKEN_TYPE_MAP.get(delimiter, None)
+
+KEYWORD_TO_TOKEN_TYPE_MAP = {
+    'abstract': TokenType.ABSTRACT,
+    'as': TokenType.AS,
+    'class': TokenType.CLASS,
+    'else': TokenType.ELSE,
+    'extends': TokenType.EXTENDS,
+    'false': TokenType.FALSE,
+    'final': TokenType.FINAL,
+    'func': TokenType.FUNC,
+    'for': TokenType.FOR,
+    'if': TokenType.IF,
+    'in': TokenType.IN,
+    'lazy': TokenType.LAZY,
+    'let': TokenType.LET,
+    'new': TokenType.NEW,
+    'null': TokenType.NULL,
+    'override': TokenType.OVERRIDE,
+    'private': TokenType.PRIVATE,
+    'protected': TokenType.PROTECTED,
+    'return': TokenType.RETURN,
+    'super': TokenType.SUPER,
+    'to': TokenType.TO,
+    'this': TokenType.THIS,
+    'true': TokenType.TRUE,
+    'var': TokenType.VAR,
+    'while': TokenType.WHILE,
+}
+
+OPERATOR_TO_TOKEN_TYPE_MAP = {
+    '.': TokenType.DOT,
+    '=': TokenType.EQUAL,
+    '<-': TokenType.LEFT_ARROW,
+    '->': TokenType.RIGHT_ARROW,
+    '/=': TokenType.DIV_EQUAL,
+    '-=': TokenType.MINUS_EQUAL,
+    '%=': TokenType.MOD_EQUAL,
+    '+=': TokenType.PLUS_EQUAL,
+    '*=': TokenType.TIMES_EQUAL,
+    '/': TokenType.DIV,
+    '+': TokenType.PLUS,
+    '-': TokenType.MINUS,
+    '*': TokenType.TIMES,
+    '%': TokenType.MOD,
+    '==': TokenType.DOUBLE_EQUAL,
+    '>': TokenType.GREATER,
+    '<': TokenType.LESS,
+    '>=': TokenType.GREATER_OR_EQUAL,
+    '<=': TokenType.LESS_OR_EQUAL,
+    '!': TokenType.NOT,
+    '!=': TokenType.NOT_EQUAL,
+    '&&': TokenType.AND,
+    '||': TokenType.OR,
+    '~': TokenType.TILDE,
+    '~=': TokenType.TILDE_EQUAL,
+    '$': TokenType.DOLLAR,
+    '$=': TokenType.DOLLAR_EQUAL,
+    '^': TokenType.CARET,
+    '^=': TokenType.CARET_EQUAL,
+}
+
+DELIMITER_TO_TOKEN_TYPE_MAP = {
+    ':': TokenType.COLON,
+    ',': TokenType.COMMA,
+    '{': TokenType.LEFT_BRACE,
+    '}': TokenType.RIGHT_BRACE,
+    '(': TokenType.LEFT_PAREN,
+    ')': TokenType.RIGHT_PAREN,
+    '[': TokenType.LEFT_BRACKET,
+    ']': TokenType.RIGHT_BRACKET,
+}
+
+# token types whose value is always the same spelling
+TOKEN_TYPE_SPELLINGS = dict(
+    (token_type, spelling)
+    for spelling, token_type in KEYWORD_TO_TOKEN_TYPE_MAP.items())
+TOKEN_TYPE_SPELLINGS.update(
+    (token_type, spelling)
+    for spelling, token_type in OPERATOR_TO_TOKEN_TYPE_MAP.items())
+TOKEN_TYPE_SPELLINGS.update(
+    (token_type, spelling)
+    for spelling, token_type in DELIMITER_TO_TOKEN_TYPE_MAP.items())
+TOKEN_TYPE_SPELLINGS[TokenType.NEWLINE] = '\n'
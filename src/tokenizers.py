@@ -1,8 +1,7 @@
-from char_utils import CharType, CharUtils
+from .char_utils import CharUtils
 from enum import Enum
-from number_fsm import NumberFSM
-from token import Token
-from token_types import TokenType
+from .number_fsm import NumberFSM
+from .token_types import OPERATOR_TO_TOKEN_TYPE_MAP, TokenType
 
 class OperatorType(Enum):
     EQUAL = 1,
@@ -22,196 +21,212 @@ class OperatorType(Enum):
 
     @staticmethod
     def map_operator_to_type(operator):
-        operator_map = {
-            '=': OperatorType.EQUAL,
-            '+': OperatorType.PLUS,
-            '-': OperatorType.MINUS,
-            '*': OperatorType.TIMES,
-            '/': OperatorType.DIV,
-            '>': OperatorType.GREATER,
-            '<': OperatorType.LESS,
-            '!': OperatorType.NOT,
-            '&': OperatorType.AMP,
-            '%': OperatorType.MOD,
-            '~': OperatorType.TILDE,
-            '$': OperatorType.DOLLAR,
-            '^': OperatorType.CARET,
-            '|': OperatorType.PIPE,
-        }
-        return operator_map.get(operator, None)
+        return OPERATOR_CHARACTER_TO_TYPE_MAP.get(operator, None)
+
+OPERATOR_CHARACTER_TO_TYPE_MAP = {
+    '=': OperatorType.EQUAL,
+    '+': OperatorType.PLUS,
+    '-': OperatorType.MINUS,
+    '*': OperatorType.TIMES,
+    '/': OperatorType.DIV,
+    '>': OperatorType.GREATER,
+    '<': OperatorType.LESS,
+    '!': OperatorType.NOT,
+    '&': OperatorType.AMP,
+    '%': OperatorType.MOD,
+    '~': OperatorType.TILDE,
+    '$': OperatorType.DOLLAR,
+    '^': OperatorType.CARET,
+    '|': OperatorType.PIPE,
+}
+
+def _build_operator_table():
+    # maps the first character of an operator to its own token type and to
+    # the token types of the two character operators it begins
+    table = dict(
+        (operator, (TokenType.UNRECOGNIZED, {}))
+        for operator in OPERATOR_CHARACTER_TO_TYPE_MAP)
+    table['.'] = (TokenType.DOT, {})
+    for operator, token_type in OPERATOR_TO_TOKEN_TYPE_MAP.items():
+        if len(operator) == 1:
+            table[operator] = (token_type, table[operator][1])
+        else:
+            table[operator[0]][1][operator[1]] = token_type
+    return table
 
 class Tokenizer(object):
 
+    NUMBER_FSM = NumberFSM()
+    OPERATOR_TABLE = _build_operator_table()
+
     @staticmethod
     def tokenize_delimiter(lexer, char):
-        if CharUtils.classify(char) is not CharType.DELIMITER:
-            raise ValueError('Character must be one of [, ], {, }, (, ), :, or comma.')
-
-        start_line, start_column = lexer.line, lexer.column
+        start, start_line, start_column = (
+            lexer.position, lexer.line, lexer.column)
         lexer.move_right()
-        return Token(
+        return lexer.make_token(
             TokenType.get_delimiter_token_type(char),
-            char,
+            start,
+            start + 1,
             start_line,
             start_column,
         )
 
     @staticmethod
     def tokenize_identifier(lexer, char):
-        if CharUtils.classify(char) not in [CharType.LETTER, CharType.UNDERSCORE]:
-            raise ValueError('Identifiers must begin with LETTER or UNDERSCORE (_).')
-
+        start = lexer.position
         start_line = lexer.line
         start_column = lexer.column
-        token_value = ''
+        source = lexer.input
+        end = len(source)
+        position = start + 1
 
-        for c in lexer.input[lexer.position:]:
-            if CharUtils.classify(c) not in CharUtils.IDENTIFIER_TYPES:
-                break
-            token_value += c
-
-        lexer.move_right_n(len(token_value))
-
-        keyword_to_token_type_map = {
-            'abstract': TokenType.ABSTRACT,
-            'as': TokenType.AS,
-            'class': TokenType.CLASS,
-            'else': TokenType.ELSE,
-            'extends': TokenType.EXTENDS,
-            'false': TokenType.FALSE,
-            'final': TokenType.FINAL,
-            'func': TokenType.FUNC,
-            'for': TokenType.FOR,
-            'if': TokenType.IF,
-            'in': TokenType.IN,
-            'lazy': TokenType.LAZY,
-            'let': TokenType.LET,
-            'new': TokenType.NEW,
-            'null': TokenType.NULL,
-            'override': TokenType.OVERRIDE,
-            'private': TokenType.PRIVATE,
-            'protected': TokenType.PROTECTED,
-            'return': TokenType.RETURN,
-            'super': TokenType.SUPER,
-            'to': TokenType.TO,
-            'this': TokenType.THIS,
-            'true': TokenType.TRUE,
-            'var': TokenType.VAR,
-            'while': TokenType.WHILE,
-        }
-
-        return Token(
-            keyword_to_token_type_map.get(token_value, TokenType.IDENTIFIER),
-            token_value,
+        while (position < end and
+            source[position] in CharUtils.IDENTIFIER_CHARACTERS):
+            position += 1
+
+        lexer.move_right_n(position - start)
+
+        # one lookup gives the keyword type or IDENTIFIER, the symbol id and
+        # the spelling shared by every occurrence of the name
+        symbol_id, token_type, spelling = lexer.symbols.intern(
+            source[start:position])
+
+        token = lexer.make_token(
+            token_type,
+            start,
+            position,
             start_line,
-            start_column)
+            start_column,
+            spelling)
+        token.symbol_id = symbol_id
+        return token
 
     @staticmethod
     def tokenize_newline(lexer, char):
-        if CharUtils.classify(char) is not CharType.NEWLINE:
-            raise ValueError('Character must be newline (\n).')
+        start, start_line, start_column = (
+            lexer.position, lexer.line, lexer.column)
 
-        start_line, start_column = lexer.line, lexer.column
+        # `\r\n` is a single newline; a lone `\r` is not one at all
+        if char == '\r':
+            if lexer.look_ahead() != '\n':
+                return None
+            lexer.position += 1
 
         lexer.next_line()
 
-        return Token(
+        return lexer.make_token(
             TokenType.NEWLINE,
-            char,
+            start,
+            lexer.position,
             start_line,
             start_column,
         )
 
     @staticmethod
-    def tokenize_number(lexer, char):
-        if CharUtils.classify(char) not in (CharUtils.DIGIT_TYPES + [CharType.DOT]):
-            raise ValueError('Numbers must begin with ZERO, POSITIVE_DIGIT, or dot (.).')
+    def tokenize_comment(lexer, char):
+        start, start_line, start_column = (
+            lexer.position, lexer.line, lexer.column)
+        end = lexer.COMMENT_PATTERN.match(lexer.input, start).end()
+        lexer.move_right_n(end - start)
+
+        return lexer.make_token(
+            TokenType.COMMENT,
+            start,
+            end,
+            start_line,
+            start_column,
+        )
 
-        fsm = NumberFSM()
-        token_type, token_value = fsm.run(lexer.input[lexer.position:])
+    @staticmethod
+    def tokenize_number(lexer, char):
+        token_type, end = Tokenizer.NUMBER_FSM.scan(lexer.input, lexer.position)
 
         if token_type:
             # if we have a valid number, update the lexer position to reflect
             # the length of the number and return the token
-            start_line, start_column = lexer.line, lexer.column
-            lexer.move_right_n(len(token_value))
-            return Token(token_type, token_value, start_line, start_column)
+            start, start_line, start_column = (
+                lexer.position, lexer.line, lexer.column)
+            lexer.move_right_n(end - start)
+            return lexer.make_token(
+                token_type,
+                start,
+                end,
+                start_line,
+                start_column)
 
         return None
 
     @staticmethod
     def tokenize_operator(lexer, char):
-        char_type = CharUtils.classify(char)
-        operator_type = OperatorType.map_operator_to_type(char)
         next_char = lexer.look_ahead()
-        next_operator_type = OperatorType.map_operator_to_type(next_char)
-
-        start_line, start_column = lexer.line, lexer.column
-        token_value = char
-
-        # all of these symbols can have `=` tacked on to them
-        extended_by_equal = [
-            OperatorType.PLUS,
-            OperatorType.MINUS,
-            OperatorType.MOD,
-            OperatorType.DIV,
-            OperatorType.TIMES,
-            OperatorType.LESS,
-            OperatorType.EQUAL,
-            OperatorType.GREATER,
-            OperatorType.EQUAL,
-            OperatorType.NOT,
-        ]
-
-        if char_type is CharType.DOT:
-            if CharUtils.classify(lexer.look_ahead()) in CharUtils.DIGIT_TYPES:
-                return Tokenizer.tokenize_number(lexer, char)
-        elif (operator_type in extended_by_equal and
-            next_operator_type is OperatorType.EQUAL):
-            token_value += next_char
-        elif (operator_type is OperatorType.LESS and
-            next_operator_type is OperatorType.MINUS):
-            # gives us the arrow operator
-            token_value += next_char
-        elif (operator_type is OperatorType.MINUS and
-            next_operator_type is OperatorType.GREATER):
-            token_value += next_char
-        elif (operator_type is OperatorType.AMP or
-            operator_type is OperatorType.PIPE):
-            if next_operator_type == operator_type:
-                token_value += next_char
-            else:
-                return None
 
-        lexer.move_right_n(len(token_value))
-        return Token(
-            TokenType.get_operator_token_type(token_value),
-            token_value,
+        if char == '.' and next_char in CharUtils.DIGIT_CHARACTERS:
+            return lexer.nested_tokenizer_map['number'](lexer, char)
+
+        # comments only get this far when the lexer keeps them as tokens
+        if char == '/' and next_char == '/':
+            return lexer.nested_tokenizer_map['comment'](lexer, char)
+
+        start, start_line, start_column = (
+            lexer.position, lexer.line, lexer.column)
+
+        # maximal munch: take the two character operator when there is one;
+        # a lone `&` or `|` has no token type of its own, and is reported
+        # like any other stray character when recovering
+        token_type, extensions = Tokenizer.OPERATOR_TABLE[char]
+        extended_type = extensions.get(next_char, None)
+        if extended_type:
+            token_type = extended_type
+            lexer.move_right_n(2)
+        elif token_type is TokenType.UNRECOGNIZED and lexer.recover:
+            return lexer.recover_token()
+        else:
+            lexer.move_right()
+
+        return lexer.make_token(
+            token_type,
+            start,
+            lexer.position,
             start_line,
             start_column
         )
 
     @staticmethod
     def tokenize_string(lexer, char):
-        if CharUtils.classify(char) is not CharType.DOUBLE_QUOTE:
-            raise ValueError('Strings must begin and end with DOUBLE_QUOTE (").')
-
-        token_value = ''
+        start = lexer.position
         start_line = lexer.line
         start_column = lexer.column
-
-        for position in range(lexer.position, len(lexer.input)):
-            c = lexer.input[position]
-            token_value += c
-
-            # terminating double quote
-            if (CharUtils.classify(c) is CharType.DOUBLE_QUOTE and not
-                (position == lexer.position or
-                CharUtils.classify(lexer.input[position - 1]) is CharType.ESCAPE_CHARACTER)):
+        source = lexer.input
+        find = source.find
+        end = len(source)
+        position = start + 1
+
+        # jump from quote to quote; a backslash before the next quote escapes
+        # whatever character follows it, so scanning resumes past that. The
+        # next quote is only searched for again once an escape has passed it,
+        # so every character is scanned once
+        quote = find('"', position)
+        while quote != -1:
+            backslash = find('\\', position, quote)
+            if backslash == -1:
                 break
-
-        if token_value[-1] == '"':
-            lexer.move_right_n(len(token_value))
-            return Token(TokenType.STRING, token_value, start_line, start_column)
+            position = backslash + 2
+            if position > quote:
+                quote = find('"', position)
+
+        if quote == -1:
+            # an unterminated string is only accepted when the input happens
+            # to end with a double quote
+            quote = end - 1
+
+        if source[quote] == '"':
+            lexer.move_right_n(quote + 1 - start)
+            return lexer.make_token(
+                TokenType.STRING,
+                start,
+                lexer.position,
+                start_line,
+                start_column)
 
         return None
@@ -1,7 +1,32 @@
+import io
+import os
+import shutil
+import socket
+import sys
+import tempfile
+import threading
+import time
 import unittest
 
+from benchmarks.corpus import CorpusGenerator
+from benchmarks.run import run
+from src.batch_lexer import lex_batch
+from src.bytes_lexer import BytesLexer
+from src.char_utils import CharType, CharUtils
+from src.incremental_lexer import IncrementalLexer
+from src.lex_server import LexClient, LexServer
 from src.lexer import Lexer
-from src.token_types import TokenType
+from src.lexer_profile import LexerProfile
+from src.line_index import LineIndex
+from src.mapped_lexer import MappedLexer
+from src.number_fsm import NumberFSM
+from src.parallel_lexer import ParallelLexer
+from src.regex_lexer import RegexLexer
+from src.stream_lexer import StreamLexer
+from src.symbol_table import SymbolTable
+from src.token_buffer import TokenBuffer
+from src.token_cache import LRUTokenCache, TokenCache
+from src.token_types import TOKEN_TYPE_SPELLINGS, TokenType
 
 class NextTokenTest(unittest.TestCase):
 
@@ -89,6 +114,14 @@ class NextTokenTest(unittest.TestCase):
         self.assertEqual(token.type, TokenType.STRING)
         self.assertEqual(token.value, '"a string containing an \\" escaped double quote"')
 
+    def test_should_recognize_a_string_ending_with_an_escaped_backslash(self):
+        lexer = Lexer('"\\\\" + 1')
+        token = lexer.next_token()
+
+        self.assertEqual(token.type, TokenType.STRING)
+        self.assertEqual(token.value, '"\\\\"')
+        self.assertEqual(lexer.next_token().type, TokenType.PLUS)
+
     def test_should_recognize_a_string_containing_escape_sequences(self):
         lexer = Lexer('"a string containing \\t\\b\\r\\f\\v\\0 escape sequences"')
         token = lexer.next_token()
@@ -96,6 +129,14 @@ class NextTokenTest(unittest.TestCase):
         self.assertEqual(token.type, TokenType.STRING)
         self.assertEqual(token.value, '"a string containing \\t\\b\\r\\f\\v\\0 escape sequences"')
 
+    def test_should_recognize_a_string_mixing_escaped_quotes_and_sequences(self):
+        lexer = Lexer('"\\n\\"a\\t\\"\\\\" "b"')
+        token = lexer.next_token()
+
+        self.assertEqual(token.type, TokenType.STRING)
+        self.assertEqual(token.value, '"\\n\\"a\\t\\"\\\\"')
+        self.assertEqual(lexer.next_token().value, '"b"')
+
     def test_should_recognize_an_identifier_of_a_single_letter(self):
         lexer = Lexer('i')
         token = lexer.next_token()
@@ -530,6 +571,34 @@ class NextTokenTest(unittest.TestCase):
         self.assertEqual(token.type, TokenType.NEWLINE)
         self.assertEqual(token.value, '\n')
 
+    def test_should_recognize_the_tilde_equal_operator(self):
+        lexer = Lexer('~=')
+        token = lexer.next_token()
+
+        self.assertEqual(token.type, TokenType.TILDE_EQUAL)
+        self.assertEqual(token.value, '~=')
+
+    def test_should_recognize_the_dollar_operator(self):
+        lexer = Lexer('$')
+        token = lexer.next_token()
+
+        self.assertEqual(token.type, TokenType.DOLLAR)
+        self.assertEqual(token.value, '$')
+
+    def test_should_recognize_the_caret_equal_operator(self):
+        lexer = Lexer('^=')
+        token = lexer.next_token()
+
+        self.assertEqual(token.type, TokenType.CARET_EQUAL)
+        self.assertEqual(token.value, '^=')
+
+    def test_should_mark_a_lone_ampersand_as_unrecognized(self):
+        lexer = Lexer('&')
+        token = lexer.next_token()
+
+        self.assertEqual(token.type, TokenType.UNRECOGNIZED)
+        self.assertEqual(token.value, '&')
+
 class TokenizeTest(unittest.TestCase):
 
     def test_should_tokenize_a_simple_expression(self):
@@ -676,3 +745,1008 @@ class TokenizeTest(unittest.TestCase):
 
         self.assertEqual(2, tokens[20].line)
         self.assertEqual(0, tokens[20].column)
+
+class CharUtilsTest(unittest.TestCase):
+
+    def test_lookup_table_should_agree_with_reference_classifier(self):
+        for code in range(256):
+            char = chr(code)
+            self.assertEqual(
+                CharUtils.classify(char), CharUtils.classify_reference(char))
+
+    def test_should_classify_missing_characters_as_unrecognized(self):
+        self.assertEqual(CharUtils.classify(None), CharType.UNRECOGNIZED)
+        self.assertEqual(CharUtils.classify(''), CharType.UNRECOGNIZED)
+
+class RegexLexerTest(unittest.TestCase):
+
+    SOURCES = [
+        'func add(a: Int, b: Int): Int = {\n   a + b\n}',
+        'let x <- .25 * 42e-65 / 3.14E+2 % 0',
+        'if (a <= b && c != d || !e) { return a->b }',
+        'var s = "a string with \\" escaped \\\\ characters"',
+        'x += 1\ny -= 2\nz *= 3\nw /= 4\nv %= 5\nu == 6 >= 7',
+        'an$identifier toString _private ~ $ ^ ~= $= ^= & | .',
+        '42 ',
+    ]
+
+    def assertSameTokens(self, source):
+        expected = Lexer(source).tokenize()
+        actual = RegexLexer(source).tokenize()
+
+        self.assertEqual(len(expected), len(actual))
+        for expected_token, actual_token in zip(expected, actual):
+            self.assertEqual(expected_token.type, actual_token.type)
+            self.assertEqual(expected_token.value, actual_token.value)
+            self.assertEqual(expected_token.line, actual_token.line)
+            self.assertEqual(expected_token.column, actual_token.column)
+
+    def test_should_produce_the_same_tokens_as_the_dispatch_lexer(self):
+        for source in self.SOURCES:
+            self.assertSameTokens(source)
+
+    def test_should_return_none_for_an_invalid_number(self):
+        self.assertIsNone(RegexLexer('1.').next_token())
+
+    def test_should_return_none_for_an_unterminated_string(self):
+        self.assertIsNone(RegexLexer('"abc').next_token())
+
+    def test_should_raise_on_unrecognized_characters(self):
+        self.assertRaises(ValueError, RegexLexer('#').next_token)
+
+    def test_should_iterate_the_same_tokens_as_next_token(self):
+        source = 'a <- 1.\n  # "x" // c\r\n"open\n'
+        for keep_comments in (False, True):
+            lexer = RegexLexer(
+                source, recover=True, keep_comments=keep_comments)
+            expected = RegexLexer(
+                source, recover=True, keep_comments=keep_comments)
+            tokens = lexer.tokenize()
+
+            self.assertEqual(
+                [(t.type, t.value, t.line, t.column) for t in tokens],
+                [(t.type, t.value, t.line, t.column)
+                    for t in Lexer.iter_tokens(expected)])
+            self.assertEqual(
+                [d.message for d in lexer.diagnostics],
+                [d.message for d in expected.diagnostics])
+            self.assertEqual(
+                (lexer.position, lexer.line), (len(source), 3))
+
+class NumberFSMTest(unittest.TestCase):
+
+    def test_should_scan_a_number_starting_at_an_offset(self):
+        token_type, token_value = NumberFSM().run('x = 3.14 + y', 4)
+
+        self.assertEqual(token_type, TokenType.DECIMAL)
+        self.assertEqual(token_value, '3.14')
+
+    def test_should_stop_scanning_at_the_end_offset(self):
+        token_type, token_value = NumberFSM().run('12345', 0, 3)
+
+        self.assertEqual(token_type, TokenType.INTEGER)
+        self.assertEqual(token_value, '123')
+
+    def test_should_scan_to_the_end_offset_of_a_number(self):
+        self.assertEqual(
+            NumberFSM().scan('[1, 2.5e+3]', 4), (TokenType.DECIMAL, 10))
+
+    def test_should_reject_a_number_with_a_trailing_dot(self):
+        self.assertEqual(NumberFSM().run('1.'), (None, None))
+
+class IterTokensTest(unittest.TestCase):
+
+    def test_should_yield_tokens_lazily(self):
+        lexer = Lexer('42 + 21')
+        tokens = lexer.iter_tokens()
+
+        self.assertEqual(next(tokens).value, '42')
+        self.assertEqual(lexer.position, 2)
+
+        self.assertEqual(next(tokens).value, '+')
+        self.assertEqual(lexer.position, 4)
+
+    def test_should_iterate_over_the_lexer(self):
+        values = [token.value for token in Lexer('a = b\n')]
+
+        self.assertEqual(values, ['a', '=', 'b', '\n'])
+
+class StreamLexerTest(unittest.TestCase):
+
+    SOURCE = ('func add(a: Int, b: Int): Int = {\n' +
+        '   a <- "a long \\" string" + 3.14e-2 && b\n' +
+        '}\n')
+
+    def assertSameTokens(self, expected, actual):
+        self.assertEqual(
+            [(t.type, t.value, t.line, t.column) for t in expected],
+            [(t.type, t.value, t.line, t.column) for t in actual])
+
+    def test_should_lex_tokens_split_across_chunks(self):
+        for chunk_size in (1, 2, 3, 7):
+            chunks = [self.SOURCE[i:i + chunk_size]
+                for i in range(0, len(self.SOURCE), chunk_size)]
+
+            self.assertSameTokens(
+                Lexer(self.SOURCE).tokenize(),
+                StreamLexer(chunks, chunk_size).tokenize())
+
+    def test_should_lex_a_file_object(self):
+        self.assertSameTokens(
+            Lexer(self.SOURCE).tokenize(),
+            StreamLexer(io.StringIO(u'' + self.SOURCE), 4).tokenize())
+
+    def test_should_keep_the_buffer_bounded(self):
+        lexer = StreamLexer(['a + b\n'] * 1000, 16)
+
+        for token in lexer:
+            self.assertTrue(len(lexer.input) < 64)
+
+    def test_should_raise_on_a_malformed_number_without_reading_ahead(self):
+        lexer = StreamLexer(['a 1. b\n'] + ['a + b\n'] * 1000, 16)
+
+        self.assertRaises(ValueError, lexer.tokenize)
+        self.assertTrue(len(lexer.input) < 64)
+
+    def test_should_keep_the_buffer_bounded_after_recovering(self):
+        for bad_line in ['a # b\n', 'a "open\n', 'a 1. b\n']:
+            lexer = StreamLexer(
+                [bad_line] + ['a + b\n'] * 1000, 16, recover=True)
+
+            for token in lexer:
+                self.assertTrue(len(lexer.input) < 64)
+            self.assertEqual(len(lexer.diagnostics), 1)
+
+    def test_should_give_up_an_open_string_at_its_line_end(self):
+        source = 'a "b\nc" d'
+        whole = StreamLexer([source], recover=True)
+        split = StreamLexer(['a "b\n', 'c" d'], 6, recover=True)
+
+        self.assertEqual(
+            [t.type for t in whole.tokenize()],
+            [t.type for t in Lexer(source, recover=True).tokenize()])
+        self.assertEqual(
+            [(t.type, t.value) for t in split.tokenize()],
+            [(TokenType.IDENTIFIER, 'a'), (TokenType.UNRECOGNIZED, '"b'),
+             (TokenType.NEWLINE, '\n'), (TokenType.IDENTIFIER, 'c'),
+             (TokenType.UNRECOGNIZED, '" d')])
+        self.assertEqual(
+            [d.message for d in split.diagnostics],
+            ['Unterminated string.', 'Unterminated string.'])
+
+    def test_should_stop_at_the_end_of_a_binary_file(self):
+        lexer = StreamLexer(io.BytesIO(b'a + b\n'), 4)
+
+        self.assertEqual(len(lexer.tokenize()), 4)
+
+class MappedLexerTest(unittest.TestCase):
+
+    SOURCE = b'func add(a: Int) = {\n   a + 3.14 "a \\" string"\n}\n'
+
+    def assertSameTokens(self, lexer):
+        expected = Lexer(self.SOURCE.decode('utf-8')).tokenize()
+        actual = lexer.tokenize()
+
+        self.assertEqual(
+            [(t.type, t.value, t.line, t.column) for t in expected],
+            [(t.type, bytes(bytearray(t.value)).decode('utf-8'), t.line, t.column)
+                for t in actual])
+
+    def test_should_lex_a_bytearray_with_views_into_the_buffer(self):
+        buffer = bytearray(self.SOURCE)
+        lexer = MappedLexer(buffer)
+
+        self.assertSameTokens(lexer)
+
+        token = MappedLexer(buffer).next_token()
+        self.assertIsInstance(token.value, memoryview)
+
+    def test_should_lex_a_memory_mapped_file(self):
+        handle, path = tempfile.mkstemp()
+        try:
+            with os.fdopen(handle, 'wb') as source:
+                source.write(self.SOURCE)
+
+            lexer = MappedLexer.from_file(path)
+            self.assertSameTokens(lexer)
+            lexer.close()
+        finally:
+            os.remove(path)
+
+    def test_should_stay_usable_when_closed_while_tokens_are_alive(self):
+        handle, path = tempfile.mkstemp()
+        try:
+            with os.fdopen(handle, 'wb') as source:
+                source.write(self.SOURCE)
+
+            lexer = MappedLexer.from_file(path)
+            tokens = lexer.tokenize()
+            if isinstance(tokens[0].value, memoryview):
+                self.assertRaises(BufferError, lexer.close)
+                self.assertEqual(bytes(tokens[0].value), b'func')
+                self.assertEqual(bytes(lexer.view[:4]), b'func')
+            del tokens
+            lexer.close()
+            self.assertIsNone(lexer.mapping)
+            lexer.close()
+        finally:
+            os.remove(path)
+
+class BytesLexerTest(unittest.TestCase):
+
+    SOURCE = u'func greet(a: Int) = {\n   a + 3.14 "h\xe9llo \\" you"\n}\n'
+
+    def test_should_lex_utf8_bytes_into_text_values(self):
+        expected = Lexer(self.SOURCE).tokenize()
+        actual = BytesLexer(bytearray(self.SOURCE.encode('utf-8'))).tokenize()
+
+        self.assertEqual(
+            [(t.type, t.value, t.line) for t in expected],
+            [(t.type, t.value, t.line) for t in actual])
+        self.assertEqual(actual[-4].decoded_value, u'h\xe9llo " you')
+
+    def test_should_decode_values_only_when_they_are_read(self):
+        tokens = BytesLexer(self.SOURCE.encode('utf-8')).tokenize()
+        identifier = tokens[1]
+
+        self.assertIsNone(identifier._value)
+        self.assertEqual(identifier.value, u'greet')
+        self.assertEqual(identifier._value, u'greet')
+
+    def test_should_intern_identifiers_without_decoding_them(self):
+        lexer = BytesLexer(b'a b a')
+        tokens = lexer.tokenize()
+
+        self.assertEqual(tokens[0].symbol_id, tokens[2].symbol_id)
+        self.assertTrue(b'a' in lexer.symbols)
+
+class TokenBufferTest(unittest.TestCase):
+
+    SOURCE = ('func add(a: Int, b: Int): Int = {\n' +
+        '   a + b * 3.14 ~ "string"\n' +
+        '}')
+
+    def test_should_store_the_same_tokens_as_tokenize(self):
+        expected = Lexer(self.SOURCE).tokenize()
+        buffer = TokenBuffer.from_lexer(Lexer(self.SOURCE))
+
+        self.assertEqual(len(expected), len(buffer))
+        self.assertEqual(
+            [(t.type, t.value, t.line, t.column) for t in expected],
+            [(t.type, t.value, t.line, t.column) for t in buffer])
+
+    def test_should_build_token_views_on_demand(self):
+        buffer = TokenBuffer.from_lexer(Lexer('let x <- 42'))
+        token = buffer[-1]
+
+        self.assertEqual(token.type, TokenType.INTEGER)
+        self.assertEqual(token.value, '42')
+        self.assertEqual(buffer.starts[-1], 9)
+        self.assertRaises(IndexError, buffer.__getitem__, 4)
+
+class LazyTokenValueTest(unittest.TestCase):
+
+    def test_should_keep_source_offsets_instead_of_a_value(self):
+        token = Lexer('x = "a string"').tokenize()[2]
+
+        self.assertEqual((token.start, token.end), (4, 14))
+        self.assertIsNone(token._value)
+        self.assertEqual(token.value, '"a string"')
+
+    def test_should_share_the_spelling_of_fixed_tokens(self):
+        tokens = Lexer('while (a <= b)').tokenize()
+
+        self.assertIs(tokens[0].value, TOKEN_TYPE_SPELLINGS[TokenType.WHILE])
+        self.assertIs(tokens[3].value, TOKEN_TYPE_SPELLINGS[TokenType.LESS_OR_EQUAL])
+
+class SymbolTableTest(unittest.TestCase):
+
+    def test_should_give_repeated_identifiers_the_same_id_and_spelling(self):
+        tokens = Lexer('count + other + count').tokenize()
+
+        self.assertEqual(tokens[0].symbol_id, tokens[4].symbol_id)
+        self.assertNotEqual(tokens[0].symbol_id, tokens[2].symbol_id)
+        self.assertIs(tokens[0].value, tokens[4].value)
+
+    def test_should_resolve_keywords_from_the_seeded_table(self):
+        symbols = SymbolTable()
+        symbol_id, token_type, spelling = symbols.intern('while')
+
+        self.assertEqual(token_type, TokenType.WHILE)
+        self.assertEqual(symbols.spelling(symbol_id), 'while')
+        self.assertEqual(len(symbols), 25)
+
+    def test_should_share_a_table_between_lexers(self):
+        symbols = SymbolTable()
+        first = Lexer('name', symbols).next_token()
+        second = RegexLexer('name', symbols).next_token()
+
+        self.assertEqual(first.symbol_id, second.symbol_id)
+
+class IncrementalLexerTest(unittest.TestCase):
+
+    SOURCE = ('func add(a: Int, b: Int): Int = {\n' +
+        '   a + b\n' +
+        '}\n' +
+        'let x <- "a string" + 42\n')
+
+    def assertMatchesFullLex(self, incremental):
+        self.assertEqual(
+            [(t.type, t.value, t.line, t.column, t.start, t.end)
+                for t in Lexer(incremental.source, recover=True).tokenize()],
+            [(t.type, t.value, t.line, t.column, t.start, t.end)
+                for t in incremental.tokens])
+
+    def test_should_relex_only_around_an_edit(self):
+        incremental = IncrementalLexer(self.SOURCE)
+
+        first, old_stop, new_stop = incremental.edit(41, 1, 'other')
+
+        self.assertMatchesFullLex(incremental)
+        self.assertEqual((first, old_stop, new_stop), (18, 19, 19))
+        self.assertEqual(incremental.tokens[18].value, 'other')
+
+    def test_should_shift_lines_after_an_inserted_newline(self):
+        incremental = IncrementalLexer(self.SOURCE)
+
+        incremental.edit(42, 0, '\n   c *')
+
+        self.assertMatchesFullLex(incremental)
+        self.assertEqual(incremental.tokens[-1].line, 4)
+
+    def test_should_merge_tokens_joined_by_an_edit(self):
+        incremental = IncrementalLexer(self.SOURCE)
+
+        incremental.edit(38, 3, '')
+
+        self.assertMatchesFullLex(incremental)
+        self.assertEqual(incremental.tokens[16].value, 'ab')
+
+    def test_should_shift_the_tail_when_tokens_are_read(self):
+        incremental = IncrementalLexer(self.SOURCE * 3)
+        expected = Lexer(self.SOURCE * 3).tokenize()
+
+        incremental.edit(34, 0, '\n')
+        incremental.edit(10, 0, 'x')
+        self.assertEqual(incremental[-1].start, expected[-1].start + 2)
+        self.assertEqual(incremental[-1].line, expected[-1].line + 1)
+        incremental.edit(0, 5, '')
+
+        self.assertEqual(len(incremental), len(expected))
+        self.assertMatchesFullLex(incremental)
+
+    def test_should_recover_from_an_unterminated_string_while_typing(self):
+        incremental = IncrementalLexer('let x <- 1\nlet y <- 2\n')
+
+        incremental.edit(9, 0, '"')
+        self.assertMatchesFullLex(incremental)
+        self.assertEqual(incremental.tokens[3].type, TokenType.UNRECOGNIZED)
+        self.assertEqual(incremental.unterminated, 9)
+
+        incremental.edit(22, 0, '"')
+        self.assertMatchesFullLex(incremental)
+        self.assertEqual(incremental.tokens[3].value, '"1\nlet y <- 2"')
+        self.assertEqual(incremental.unterminated, None)
+
+    def test_should_pass_lexer_options_through(self):
+        incremental = IncrementalLexer(self.SOURCE, keep_comments=True)
+
+        incremental.edit(len(self.SOURCE), 0, '// done')
+
+        self.assertEqual(incremental.tokens[-1].type, TokenType.COMMENT)
+        self.assertRaises(
+            ValueError, IncrementalLexer, '"open', recover=False)
+
+class LineIndexTest(unittest.TestCase):
+
+    SOURCE = ('func add(a: Int, b: Int): Int = {\n' +
+        '   a + b\n' +
+        '}')
+
+    def test_should_map_token_offsets_to_their_lines_and_columns(self):
+        lexer = Lexer(self.SOURCE)
+        tokens = lexer.tokenize()
+        index = lexer.line_index()
+
+        for token in tokens:
+            self.assertEqual(
+                index.position(token.start), (token.line, token.column))
+
+    def test_should_map_lines_and_columns_back_to_offsets(self):
+        index = LineIndex(self.SOURCE)
+
+        self.assertEqual(len(index), 3)
+        self.assertEqual(index.offset(1, 3), 37)
+        self.assertEqual(index.line_span(1), (34, 43))
+        self.assertEqual(index.position(len(self.SOURCE)), (2, 1))
+
+    def test_should_reject_offsets_outside_of_the_source(self):
+        index = LineIndex(self.SOURCE)
+
+        self.assertRaises(ValueError, index.position, len(self.SOURCE) + 1)
+        self.assertRaises(ValueError, index.offset, 3)
+
+class ParallelLexerTest(unittest.TestCase):
+
+    SOURCE = ('func add(a: Int, b: Int): Int = {\n' +
+        '   a + b * 3.14 - "a string"\n' +
+        '}\n') * 20
+
+    def assertSameTokens(self, expected, actual):
+        self.assertEqual(
+            [(t.type, t.value, t.line, t.column, t.start, t.end, t.symbol_id)
+                for t in expected],
+            [(t.type, t.value, t.line, t.column, t.start, t.end, t.symbol_id)
+                for t in actual])
+
+    def test_should_split_at_line_starts(self):
+        lexer = ParallelLexer(self.SOURCE, processes=4, min_chunk_size=100)
+        chunks = lexer.split()
+
+        self.assertTrue(len(chunks) > 1)
+        self.assertEqual(chunks[0][0], 0)
+        self.assertEqual(chunks[-1][1], len(self.SOURCE))
+        for start, end in chunks[1:]:
+            self.assertEqual(self.SOURCE[start - 1], '\n')
+
+    def test_should_produce_the_same_tokens_as_the_serial_lexer(self):
+        self.assertSameTokens(
+            Lexer(self.SOURCE).tokenize(),
+            ParallelLexer(
+                self.SOURCE, processes=3, min_chunk_size=100).tokenize())
+
+    def test_should_fall_back_to_the_serial_lexer_for_split_strings(self):
+        source = 'a = "raw\nnewline"\n' * 20
+
+        self.assertSameTokens(
+            Lexer(source).tokenize(),
+            ParallelLexer(source, processes=2, min_chunk_size=30).tokenize())
+
+    def test_should_count_lines_after_a_string_with_a_newline(self):
+        source = ('a = "raw\nnewline"\n' + 'b + c\n' * 5) * 10
+
+        self.assertSameTokens(
+            Lexer(source).tokenize(),
+            ParallelLexer(source, processes=3, min_chunk_size=40).tokenize())
+
+    def test_should_merge_into_a_buffer_sharing_spellings(self):
+        tokens = ParallelLexer(
+            self.SOURCE, processes=3, min_chunk_size=100).tokenize()
+        symbols = Lexer(self.SOURCE).tokenize()
+
+        self.assertEqual(
+            list(tokens.starts), [token.start for token in symbols])
+        self.assertIs(tokens[-14].value, tokens[5].value)
+        self.assertEqual(tokens.symbol_ids[3], tokens.symbol_ids[-10])
+        self.assertEqual(tokens.symbol_ids[2], -1)
+
+class BatchLexerTest(unittest.TestCase):
+
+    SNIPPETS = ['a + b', '"unterminated', 'foo(1, 2.5)\nbar']
+
+    def test_should_lex_each_snippet_with_its_own_error(self):
+        results = lex_batch(self.SNIPPETS)
+
+        self.assertEqual(len(results), 3)
+        self.assertEqual([t.value for t in results[0][0]], ['a', '+', 'b'])
+        self.assertIsNone(results[0][1])
+        self.assertIsNone(results[1][0])
+        self.assertIsInstance(results[1][1], ValueError)
+        self.assertEqual(results[2][0][-1].line, 1)
+
+    def test_should_share_symbol_ids_across_snippets(self):
+        results = lex_batch(['name', 'other name'])
+
+        self.assertEqual(results[0][0][0].symbol_id, results[1][0][1].symbol_id)
+
+    def test_should_combine_snippets_into_one_buffer(self):
+        buffer, boundaries, errors = lex_batch(self.SNIPPETS, combined=True)
+
+        self.assertEqual(boundaries, [0, 3, 3, 11])
+        self.assertEqual(errors[0], None)
+        self.assertIsInstance(errors[1], ValueError)
+        self.assertEqual(
+            [t.value for t in list(buffer)[boundaries[2]:boundaries[3]]],
+            ['foo', '(', '1', ',', '2.5', ')', '\n', 'bar'])
+
+    def test_should_report_diagnostics_instead_of_errors_when_recovering(self):
+        results = lex_batch(self.SNIPPETS, recover=True)
+
+        self.assertIsNone(results[0][1])
+        self.assertEqual(
+            [t.type for t in results[1][0]], [TokenType.UNRECOGNIZED])
+        self.assertEqual(
+            [d.message for d in results[1][1]], ['Unterminated string.'])
+        self.assertIsNone(results[2][1])
+
+class TokenCacheTest(unittest.TestCase):
+
+    SOURCE = ('func add(a: Int, b: Int): Int = {\n' +
+        '   a + b * 3.14 - "a string"\n' +
+        '}\n')
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_should_lex_once_and_then_load_from_the_cache(self):
+        cache = TokenCache(self.directory)
+
+        first = cache.tokenize(self.SOURCE)
+        second = TokenCache(self.directory).tokenize(self.SOURCE)
+
+        self.assertEqual((cache.hits, cache.misses), (0, 1))
+        self.assertEqual(
+            [(t.type, t.value, t.line, t.column) for t in Lexer(self.SOURCE).tokenize()],
+            [(t.type, t.value, t.line, t.column) for t in second])
+        self.assertEqual(list(first.starts), list(second.starts))
+
+    def test_should_count_hits(self):
+        cache = TokenCache(self.directory)
+
+        cache.tokenize(self.SOURCE)
+        cache.tokenize(self.SOURCE)
+        cache.tokenize(self.SOURCE + 'x')
+
+        self.assertEqual((cache.hits, cache.misses), (1, 2))
+
+    def test_should_ignore_a_damaged_cache_file(self):
+        cache = TokenCache(self.directory)
+        cache.tokenize(self.SOURCE)
+
+        with open(cache.path(self.SOURCE), 'r+b') as cache_file:
+            cache_file.truncate(10)
+
+        self.assertEqual(len(cache.tokenize(self.SOURCE)), 26)
+        self.assertEqual(cache.misses, 2)
+
+    def test_should_ignore_a_cache_file_cut_off_in_the_column_headers(self):
+        cache = TokenCache(self.directory)
+        cache.tokenize(self.SOURCE)
+
+        with open(cache.path(self.SOURCE), 'r+b') as cache_file:
+            cache_file.truncate(20)
+
+        self.assertEqual(len(cache.tokenize(self.SOURCE)), 26)
+        self.assertEqual(cache.misses, 2)
+
+class LRUTokenCacheTest(unittest.TestCase):
+
+    def test_should_share_cached_tokens_between_calls(self):
+        cache = LRUTokenCache(1024 * 1024)
+
+        first = cache.tokenize('let x <- 42')
+        second = cache.tokenize('let x <- 42')
+
+        self.assertIs(first, second)
+        self.assertIsInstance(first, tuple)
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+    def test_should_hand_out_read_only_tokens(self):
+        cache = LRUTokenCache(1024 * 1024)
+        token = cache.tokenize('let s <- "a\\tb"')[3]
+
+        with self.assertRaises(AttributeError):
+            token.value = 'changed'
+        with self.assertRaises(AttributeError):
+            token.type = TokenType.IDENTIFIER
+        self.assertEqual(token.value, '"a\\tb"')
+        self.assertEqual(token.decoded_value, 'a\tb')
+        self.assertIs(cache.tokenize('let s <- "a\\tb"')[3], token)
+
+    def test_should_hand_out_read_only_bytes_tokens(self):
+        cache = LRUTokenCache(1024 * 1024, BytesLexer)
+        token = cache.tokenize(b'"caf\xc3\xa9"')[0]
+
+        with self.assertRaises(AttributeError):
+            token.line = 3
+        self.assertEqual(token.value, u'"caf\xe9"')
+
+    def test_should_cache_a_bytearray_source(self):
+        cache = LRUTokenCache(1024 * 1024, BytesLexer)
+        first = cache.tokenize(bytearray(b'a b'))
+        second = cache.tokenize(bytearray(b'a b'))
+
+        self.assertEqual([token.value for token in first], [u'a', u'b'])
+        self.assertTrue(first is second)
+        self.assertTrue(cache.tokenize(b'a b') is first)
+
+    def test_should_evict_the_least_recently_used_source(self):
+        sources = ['a + b', 'c + d', 'e + f']
+        cache = LRUTokenCache(0)
+        size = cache.entry_size(sources[0], Lexer(sources[0]).tokenize())
+        cache.max_bytes = 2 * size
+
+        cache.tokenize(sources[0])
+        cache.tokenize(sources[1])
+        cache.tokenize(sources[0])
+        cache.tokenize(sources[2])
+
+        self.assertEqual(cache.evictions, 1)
+        self.assertEqual(cache.size, 2 * size)
+        cache.tokenize(sources[0])
+        self.assertEqual(cache.hits, 2)
+        cache.tokenize(sources[1])
+        self.assertEqual(cache.misses, 4)
+
+    def test_should_not_keep_sources_larger_than_the_cache(self):
+        cache = LRUTokenCache(10)
+
+        cache.tokenize('func add(a: Int, b: Int): Int')
+
+        self.assertEqual(len(cache.entries), 0)
+        self.assertEqual(cache.size, 0)
+
+class BenchmarkTest(unittest.TestCase):
+
+    def test_should_generate_the_same_corpus_for_the_same_seed(self):
+        self.assertEqual(
+            CorpusGenerator(7).generate('program', 2000),
+            CorpusGenerator(7).generate('program', 2000))
+        self.assertNotEqual(
+            CorpusGenerator(7).generate('program', 2000),
+            CorpusGenerator(8).generate('program', 2000))
+
+    def test_should_generate_corpora_that_lex_without_errors(self):
+        for category in CorpusGenerator.CATEGORIES:
+            source = CorpusGenerator(3).generate(category, 2000)
+
+            self.assertTrue(len(source) >= 2000)
+            self.assertEqual(
+                len(Lexer(source).tokenize()),
+                len(RegexLexer(source).tokenize()))
+
+    def test_should_report_throughput_per_category_and_size(self):
+        report = run('dispatch', ['numbers', 'strings'], [500, 1000], 0, 1)
+        results = report['results']
+
+        self.assertEqual(
+            [(result['category'], result['size']) for result in results],
+            [('numbers', 500), ('numbers', 1000),
+             ('strings', 500), ('strings', 1000)])
+        for result in results:
+            self.assertTrue(result['tokens'] > 0)
+            self.assertTrue(result['tokens_per_second'] > 0)
+            self.assertTrue(result['mb_per_second'] > 0)
+
+class LexerProfileTest(unittest.TestCase):
+
+    def test_should_record_calls_and_characters_per_tokenizer(self):
+        lexer = Lexer('let total <- 12.5 + "ab"\n')
+        profile = lexer.enable_profiling()
+        lexer.tokenize()
+        report = profile.report()
+
+        self.assertEqual(report['identifier']['calls'], 2)
+        self.assertEqual(report['identifier']['characters'], 8)
+        self.assertEqual(report['number']['characters'], 4)
+        self.assertEqual(report['string']['characters'], 4)
+        self.assertEqual(report['operator']['calls'], 2)
+        self.assertEqual(report['newline']['calls'], 1)
+        self.assertEqual(report['whitespace']['characters'], 5)
+        self.assertEqual(
+            sum(stats['characters'] for stats in report.values()), 25)
+
+    def test_should_count_nested_tokenizers_under_their_own_category(self):
+        lexer = Lexer('x <- .5 + .25 // done\n', keep_comments=True)
+        profile = lexer.enable_profiling()
+        lexer.tokenize()
+        report = profile.report()
+
+        self.assertEqual(report['number']['calls'], 2)
+        self.assertEqual(report['number']['characters'], 5)
+        self.assertEqual(report['comment']['characters'], 7)
+        self.assertEqual(report['operator']['calls'], 2)
+        self.assertEqual(report['operator']['characters'], 3)
+        self.assertEqual(
+            sum(stats['characters'] for stats in report.values()), 22)
+
+    def test_should_leave_other_lexers_unprofiled(self):
+        lexer = Lexer('a b')
+        lexer.enable_profiling()
+
+        self.assertTrue(Lexer('a b').tokenizer_map is Lexer.tokenizer_map)
+        self.assertFalse('skip_whitespace' in Lexer('a b').__dict__)
+        self.assertFalse(lexer.tokenizer_map is Lexer.tokenizer_map)
+
+    def test_should_share_a_profile_between_lexers(self):
+        profile = LexerProfile()
+        for source in ['a', 'b c']:
+            lexer = Lexer(source)
+            lexer.enable_profiling(profile)
+            lexer.tokenize()
+
+        self.assertEqual(profile.report()['identifier']['calls'], 3)
+        self.assertTrue(profile.table().startswith('category'))
+
+    def test_should_refuse_to_profile_a_regex_lexer(self):
+        for lexer in [RegexLexer('a'), MappedLexer(b'a'), BytesLexer(b'a')]:
+            self.assertRaises(TypeError, lexer.enable_profiling)
+
+    def test_should_profile_a_stream_lexer(self):
+        lexer = StreamLexer(io.StringIO(u'a b\n'))
+        profile = lexer.enable_profiling()
+        lexer.tokenize()
+
+        self.assertEqual(profile.report()['identifier']['calls'], 2)
+
+class RecoveryTest(unittest.TestCase):
+
+    SOURCE = 'let a <- 1e + b\n#c @ "open\nd'
+
+    def assert_recovers(self, lexer):
+        tokens = lexer.tokenize()
+
+        self.assertEqual(
+            [(t.type, t.value) for t in tokens if t.type is TokenType.UNRECOGNIZED],
+            [(TokenType.UNRECOGNIZED, '1e'), (TokenType.UNRECOGNIZED, '#'),
+             (TokenType.UNRECOGNIZED, '@'), (TokenType.UNRECOGNIZED, '"open')])
+        self.assertEqual(tokens[-1].value, 'd')
+        self.assertEqual(
+            [(d.message, d.line, d.column) for d in lexer.diagnostics],
+            [('Malformed number.', 0, 9),
+             ('Unrecognized character.', 1, 0),
+             ('Unrecognized character.', 1, 3),
+             ('Unterminated string.', 1, 5)])
+
+    def test_should_recover_from_invalid_input(self):
+        self.assert_recovers(Lexer(self.SOURCE, recover=True))
+
+    def test_should_recover_like_the_dispatch_lexer(self):
+        self.assert_recovers(RegexLexer(self.SOURCE, recover=True))
+
+    def test_should_recover_in_a_mapped_buffer(self):
+        lexer = MappedLexer(self.SOURCE.encode('ascii'), recover=True)
+        lexer.tokenize()
+
+        self.assertEqual(
+            [d.message for d in lexer.diagnostics],
+            ['Malformed number.', 'Unrecognized character.',
+             'Unrecognized character.', 'Unterminated string.'])
+
+    def test_should_recover_across_chunk_boundaries(self):
+        lexer = StreamLexer(iter(self.SOURCE), chunk_size=1, recover=True)
+
+        self.assert_recovers(lexer)
+
+    def test_should_skip_a_run_of_unrecognized_characters_at_once(self):
+        lexer = Lexer('a #?` b', recover=True)
+
+        self.assertEqual(
+            [t.value for t in lexer.tokenize()], ['a', '#?`', 'b'])
+        self.assertEqual(len(lexer.diagnostics), 1)
+
+    def test_should_report_a_lone_ampersand_or_pipe(self):
+        for lexer_class in [Lexer, RegexLexer]:
+            lexer = lexer_class('a & b\n|', recover=True)
+            tokens = lexer.tokenize()
+
+            self.assertEqual(
+                [(t.type, t.value) for t in tokens if t.type is TokenType.UNRECOGNIZED],
+                [(TokenType.UNRECOGNIZED, '&'), (TokenType.UNRECOGNIZED, '|')])
+            self.assertEqual(
+                [(d.message, d.line, d.column) for d in lexer.diagnostics],
+                [('Unrecognized character.', 0, 2),
+                 ('Unrecognized character.', 1, 0)])
+
+    def test_should_still_raise_when_not_recovering(self):
+        self.assertRaises(ValueError, Lexer('a # b').tokenize)
+        self.assertRaises(ValueError, Lexer('"open').tokenize)
+
+class TriviaTest(unittest.TestCase):
+
+    SOURCE = 'let a <- 1 // the answer\r\n\t\tb // c\n// only a comment\n'
+
+    def test_should_drop_comments_and_whitespace(self):
+        for lexer_class in [Lexer, RegexLexer]:
+            tokens = lexer_class(self.SOURCE).tokenize()
+
+            self.assertEqual(
+                [t.type for t in tokens],
+                [TokenType.LET, TokenType.IDENTIFIER, TokenType.LEFT_ARROW,
+                 TokenType.INTEGER, TokenType.NEWLINE, TokenType.IDENTIFIER,
+                 TokenType.NEWLINE, TokenType.NEWLINE])
+            self.assertEqual((tokens[4].start, tokens[4].end), (24, 26))
+            self.assertEqual((tokens[5].line, tokens[5].column), (1, 2))
+            self.assertEqual((tokens[6].line, tokens[6].column), (1, 8))
+
+    def test_should_keep_comments_as_tokens(self):
+        for lexer_class in [Lexer, RegexLexer]:
+            tokens = lexer_class(self.SOURCE, keep_comments=True).tokenize()
+            comments = [t for t in tokens if t.type is TokenType.COMMENT]
+
+            self.assertEqual(
+                [t.value for t in comments],
+                ['// the answer', '// c', '// only a comment'])
+            self.assertEqual(
+                [(t.line, t.column) for t in comments],
+                [(0, 11), (1, 4), (2, 0)])
+
+    def test_should_not_treat_a_lone_carriage_return_as_a_newline(self):
+        self.assertRaises(ValueError, Lexer('a\rb').tokenize)
+        self.assertRaises(ValueError, RegexLexer('a\rb').tokenize)
+
+    def test_should_still_lex_division(self):
+        tokens = Lexer('4 / 2 /= 1').tokenize()
+
+        self.assertEqual(
+            [t.type for t in tokens],
+            [TokenType.INTEGER, TokenType.DIV, TokenType.INTEGER,
+             TokenType.DIV_EQUAL, TokenType.INTEGER])
+
+    def test_should_resume_a_comment_cut_by_a_chunk_boundary(self):
+        lexer = StreamLexer(iter(self.SOURCE), chunk_size=1)
+
+        self.assertEqual(
+            [t.value for t in lexer.tokenize()],
+            ['let', 'a', '<-', '1', '\n', 'b', '\n', '\n'])
+
+class StringLiteralTest(unittest.TestCase):
+
+    SOURCE = '"tab\\t, quote \\", slash \\/, odd \\v" "plain" "\\\\" x'
+
+    def test_should_decode_escapes_lazily(self):
+        for lexer_class in [Lexer, RegexLexer]:
+            tokens = lexer_class(self.SOURCE).tokenize()
+
+            self.assertEqual(
+                [t.decoded_value for t in tokens],
+                ['tab\t, quote ", slash /, odd \\v', 'plain', '\\', 'x'])
+
+    def test_should_cache_the_decoded_value(self):
+        token = Lexer(self.SOURCE).next_token()
+        decoded = token.decoded_value
+
+        self.assertTrue(token.decoded_value is decoded)
+
+    def test_should_decode_mapped_string_values(self):
+        tokens = MappedLexer(self.SOURCE.encode('ascii')).tokenize()
+
+        self.assertEqual(tokens[2].decoded_value, '\\')
+
+@unittest.skipIf(sys.version_info < (3, 5), 'asyncio streaming needs Python 3.5+')
+class AsyncLexerTest(unittest.TestCase):
+
+    SOURCE = u'let greeting <- "h\xe9llo" // caf\xe9\r\nfoo(1, 2.5)\n'
+
+    def lex(self, lexer):
+        import asyncio
+
+        loop = asyncio.new_event_loop()
+        tokens = []
+        iterator = lexer.__aiter__()
+        try:
+            while True:
+                tokens.append(loop.run_until_complete(iterator.__anext__()))
+        except StopAsyncIteration:
+            return tokens
+        finally:
+            loop.close()
+
+    def test_should_lex_a_stream_reader_chunk_by_chunk(self):
+        import asyncio
+        from src.async_lexer import AsyncLexer
+
+        data = self.SOURCE.encode('utf-8')
+        reader = asyncio.StreamReader()
+        for position in range(0, len(data), 3):
+            reader.feed_data(data[position:position + 3])
+        reader.feed_eof()
+
+        tokens = self.lex(AsyncLexer(reader, chunk_size=3, yield_tokens=2))
+        expected = Lexer(self.SOURCE).tokenize()
+
+        self.assertEqual(
+            [(t.type, t.value, t.start, t.end) for t in expected],
+            [(t.type, t.value, t.start, t.end) for t in tokens])
+
+    def test_should_rescan_a_long_token_a_logarithmic_number_of_times(self):
+        import asyncio
+        from src.async_lexer import AsyncLexer
+
+        reader = asyncio.StreamReader()
+        reader.feed_data(b'a <- "' + b'x' * 100000 + b'"\n')
+        reader.feed_eof()
+        lexer = AsyncLexer(reader, chunk_size=64)
+        next_token = lexer.next_token
+        calls = []
+
+        def counted_next_token():
+            calls.append(None)
+            return next_token()
+
+        lexer.next_token = counted_next_token
+        tokens = self.lex(lexer)
+
+        self.assertEqual(len(tokens[2].value), 100002)
+        self.assertTrue(len(calls) < 40)
+
+    def test_should_lex_a_stream_reader_byte_by_byte(self):
+        import asyncio
+        from src.async_lexer import AsyncLexer
+
+        reader = asyncio.StreamReader()
+        reader.feed_data(self.SOURCE.encode('utf-8'))
+        reader.feed_eof()
+
+        tokens = self.lex(AsyncLexer(reader, chunk_size=1))
+        expected = Lexer(self.SOURCE).tokenize()
+
+        self.assertEqual(
+            [(t.type, t.value, t.start, t.end) for t in expected],
+            [(t.type, t.value, t.start, t.end) for t in tokens])
+
+class CrashingLexer(Lexer):
+
+    # takes its worker process down, as running out of memory would
+    def __init__(self, input, *arguments, **options):
+        if input == 'crash':
+            os._exit(1)
+        super(CrashingLexer, self).__init__(input, *arguments, **options)
+
+class LexServerTest(unittest.TestCase):
+
+    SOURCE = 'func add(a: Int) = {\n   a + "a \\" string" // done\n}\n'
+
+    def expected(self):
+        return [
+            (t.type, t.start, t.end, t.line, t.column)
+            for t in Lexer(self.SOURCE).tokenize()]
+
+    def assert_serves(self, server, address):
+        client = LexClient(address)
+        try:
+            self.assertEqual(client.tokenize(self.SOURCE), self.expected())
+            self.assertEqual(
+                client.tokenize(self.SOURCE, binary=True), self.expected())
+            self.assertRaises(ValueError, client.tokenize, '"unterminated')
+            self.assertEqual(len(client.tokenize('a b')), 2)
+        finally:
+            client.close()
+            server.close()
+
+    def test_should_serve_tokens_over_tcp(self):
+        server = LexServer(('127.0.0.1', 0), processes=0).start()
+        self.assert_serves(server, server.address)
+
+    def test_should_serve_tokens_from_worker_processes(self):
+        server = LexServer(('127.0.0.1', 0), processes=1).start()
+        self.assert_serves(server, server.address)
+
+    def test_should_fail_requests_whose_worker_dies(self):
+        server = LexServer(
+            ('127.0.0.1', 0), processes=1, lexer_class=CrashingLexer,
+            timeout=5).start()
+        client = LexClient(server.address)
+        try:
+            self.assertRaises(ValueError, client.tokenize, 'crash')
+        finally:
+            client.close()
+        self.assert_serves(server, server.address)
+
+    def test_should_fail_pending_requests_on_close(self):
+        server = LexServer(
+            ('127.0.0.1', 0), processes=1, lexer_class=CrashingLexer,
+            timeout=None).start()
+        results = []
+        thread = threading.Thread(
+            target=lambda: results.append(server.submit('crash')))
+        thread.start()
+        while not server.pending:
+            time.sleep(0.01)
+        server.close()
+        thread.join()
+        self.assertEqual(results, [(None, 'Server closed.')])
+
+    @unittest.skipIf(not hasattr(socket, 'AF_UNIX'), 'no Unix sockets')
+    def test_should_serve_tokens_over_a_unix_socket(self):
+        directory = tempfile.mkdtemp()
+        path = os.path.join(directory, 'lexer.sock')
+        try:
+            server = LexServer(path, processes=0).start()
+            self.assert_serves(server, path)
+            self.assertFalse(os.path.exists(path))
+        finally:
+            shutil.rmtree(directory)